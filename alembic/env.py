@@ -2,7 +2,7 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from app.db.base import Base
-from app.models import user, prompt
+from app.models import user, prompt, optimization_cache, user_usage, prompt_job
 from alembic import context
 import os
 from dotenv import load_dotenv
@@ -31,6 +31,17 @@ target_metadata = Base.metadata
 config.set_main_option("sqlalchemy.url", os.getenv("DATABASE_URL"))
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Skip the full-text search structures, which are not mapped on the models."""
+    if type_ == "column" and name == "search_vector":
+        return False
+    if type_ == "index" and name == "ix_prompts_search_vector":
+        return False
+    if type_ == "table" and name.startswith("prompts_fts"):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -49,6 +60,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -70,7 +82,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
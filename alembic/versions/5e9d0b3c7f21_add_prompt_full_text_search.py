@@ -0,0 +1,82 @@
+"""add prompt full text search
+
+Revision ID: 5e9d0b3c7f21
+Revises: 8c4f1a2d6e93
+Create Date: 2026-10-16 12:03:55.281640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9d0b3c7f21'
+down_revision: Union[str, Sequence[str], None] = '8c4f1a2d6e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Adding a STORED generated column rewrites prompts under an ACCESS EXCLUSIVE
+        # lock, blocking reads and writes for the duration; on large tables run this
+        # revision in a maintenance window. The index below is built without the lock.
+        op.execute("""
+            ALTER TABLE prompts ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(original_prompt, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(optimized_prompt, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(explanation, '')), 'C')
+            ) STORED
+        """)
+        with op.get_context().autocommit_block():
+            op.create_index('ix_prompts_search_vector', 'prompts', ['search_vector'],
+                            postgresql_using='gin', postgresql_concurrently=True)
+    elif dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE prompts_fts USING fts5(
+                prompt_id UNINDEXED, original_prompt, optimized_prompt, explanation,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER prompts_fts_ai AFTER INSERT ON prompts BEGIN
+                INSERT INTO prompts_fts (prompt_id, original_prompt, optimized_prompt, explanation)
+                VALUES (new.id, new.original_prompt, new.optimized_prompt, new.explanation);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER prompts_fts_ad AFTER DELETE ON prompts BEGIN
+                DELETE FROM prompts_fts WHERE prompt_id = old.id;
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER prompts_fts_au
+            AFTER UPDATE OF original_prompt, optimized_prompt, explanation ON prompts BEGIN
+                DELETE FROM prompts_fts WHERE prompt_id = old.id;
+                INSERT INTO prompts_fts (prompt_id, original_prompt, optimized_prompt, explanation)
+                VALUES (new.id, new.original_prompt, new.optimized_prompt, new.explanation);
+            END
+        """)
+        op.execute("""
+            INSERT INTO prompts_fts (prompt_id, original_prompt, optimized_prompt, explanation)
+            SELECT id, original_prompt, optimized_prompt, explanation FROM prompts
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_prompts_search_vector', table_name='prompts',
+                          postgresql_concurrently=True)
+        op.drop_column('prompts', 'search_vector')
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS prompts_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS prompts_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS prompts_fts_ai")
+        op.execute("DROP TABLE IF EXISTS prompts_fts")
@@ -0,0 +1,45 @@
+"""add prompt history indexes
+
+Revision ID: 8c4f1a2d6e93
+Revises: 3b7e2c91d4a6
+Create Date: 2026-10-16 10:41:07.517392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f1a2d6e93'
+down_revision: Union[str, Sequence[str], None] = '3b7e2c91d4a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently on PostgreSQL so large prompt tables stay writable.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_prompts_user_id_created_at_id', 'prompts',
+            ['user_id', sa.text('created_at DESC'), 'id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_prompts_user_id_favorite_created_at_id', 'prompts',
+            ['user_id', sa.text('created_at DESC'), 'id'],
+            postgresql_where=sa.text('is_favorite = true'),
+            sqlite_where=sa.text('is_favorite = 1'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_prompts_user_id_favorite_created_at_id',
+                      table_name='prompts', postgresql_concurrently=True)
+        op.drop_index('ix_prompts_user_id_created_at_id',
+                      table_name='prompts', postgresql_concurrently=True)
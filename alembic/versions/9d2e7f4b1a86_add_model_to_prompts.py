@@ -0,0 +1,30 @@
+"""add model to prompts
+
+Revision ID: 9d2e7f4b1a86
+Revises: a41f6c8e2d57
+Create Date: 2026-10-16 15:31:52.640219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2e7f4b1a86'
+down_revision: Union[str, Sequence[str], None] = 'a41f6c8e2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('prompts', sa.Column('model', sa.String(), nullable=True))
+    # Every prompt stored before model routing was optimized with gpt-4.
+    op.execute("UPDATE prompts SET model = 'gpt-4'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('prompts', 'model')
@@ -0,0 +1,53 @@
+"""add prompt jobs
+
+Revision ID: a41f6c8e2d57
+Revises: e7b3d5a90c14
+Create Date: 2026-10-16 14:48:05.113762
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f6c8e2d57'
+down_revision: Union[str, Sequence[str], None] = 'e7b3d5a90c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'prompt_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('prompt_text', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('prompt_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['prompt_id'], ['prompts.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_prompt_jobs_status_priority_created_at', 'prompt_jobs',
+                    ['status', sa.text('priority DESC'), 'created_at'], unique=False)
+    op.create_index('ix_prompt_jobs_user_id_status', 'prompt_jobs',
+                    ['user_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_prompt_jobs_user_id_status', table_name='prompt_jobs')
+    op.drop_index('ix_prompt_jobs_status_priority_created_at', table_name='prompt_jobs')
+    op.drop_table('prompt_jobs')
@@ -0,0 +1,31 @@
+"""normalize sqlite prompt timestamps
+
+Revision ID: b5c1e9d3a7f2
+Revises: 9d2e7f4b1a86
+Create Date: 2026-10-17 09:12:44.603118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c1e9d3a7f2'
+down_revision: Union[str, Sequence[str], None] = '9d2e7f4b1a86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite compares timestamps as text; whole-second values stored by now() must
+    # carry the fraction the application writes for keyset pagination to terminate.
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("UPDATE prompts SET created_at = created_at || '.000000' "
+                   "WHERE length(created_at) = 19")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
@@ -0,0 +1,29 @@
+"""add prompts_version to users
+
+Revision ID: c2a8e4f61b07
+Revises: 5e9d0b3c7f21
+Create Date: 2026-10-16 13:26:12.908344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2a8e4f61b07'
+down_revision: Union[str, Sequence[str], None] = '5e9d0b3c7f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('prompts_version', sa.Integer(),
+                                     server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'prompts_version')
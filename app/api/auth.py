@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from app.schemas.auth import LoginRequest, RegisterRequest, Token, TokenRefreshRequest, AccessTokenOnly, UserUpdateRequest
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.auth import LoginRequest, RegisterRequest, Token, TokenRefreshRequest, AccessTokenOnly, UserUpdateRequest, CurrentUser
 from app.services.auth_service import (
-    register_user, authenticate_user, create_token_pair, create_access_token, update_user
+    register_user, authenticate_user, create_token_pair, create_access_token, update_user,
+    deactivate_user, get_active_user, get_cached_user
 )
-from app.db.session import SessionLocal
+from app.schemas.usage import UsageResponse
+from app.services.usage_service import get_usage, utc_today
+from app.db.replicas import ReadSessionLocal, replicas
+from app.db.session import get_db
 from app.core.security import verify_token
-from app.models.user import User
 from app.core.security import api_key_scheme
 from app.core.rate_limiter import limiter
 
@@ -16,21 +22,13 @@ AUTH_RATE_LIMIT = "100 per hour"
 REFRESH_RATE_LIMIT = "200 per hour"
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/register", response_model=Token)
 @limiter.limit(AUTH_RATE_LIMIT)
-def register(request: Request, data: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: Request, data: RegisterRequest, db: AsyncSession = Depends(get_db)):
     """
     Registers a new user and returns a pair of access and refresh tokens.
     """
-    user = register_user(db, data.email, data.password,
+    user = await register_user(db, data.email, data.password,
                          data.username, data.full_name)
     tokens = create_token_pair(user.id)
     return tokens
@@ -38,12 +36,12 @@ def register(request: Request, data: RegisterRequest, db: Session = Depends(get_
 
 @router.post("/login", response_model=Token)
 @limiter.limit(AUTH_RATE_LIMIT)
-def login(request: Request, data: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: Request, data: LoginRequest, db: AsyncSession = Depends(get_db)):
     """
     Authenticates a user and returns a pair of access and refresh tokens.
     Raises HTTPException if credentials are invalid.
     """
-    user = authenticate_user(db, data.email, data.password)
+    user = await authenticate_user(db, data.email, data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     tokens = create_token_pair(user.id)
@@ -65,13 +63,16 @@ def refresh(request: Request, data: TokenRefreshRequest):
     return {"access_token": access_token}
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(api_key_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
     """
     Dependency that retrieves the current authenticated user from the access token.
-    Raises HTTPException if the token is invalid or the user does not exist.
+    The user is resolved through a short-lived cache; a cache miss is read from a
+    replica when one is healthy, falling back to the primary for users the replica
+    does not have yet.
+    Raises HTTPException if the token is invalid or the user does not exist or is inactive.
     """
     if not token.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing Bearer prefix")
@@ -79,14 +80,32 @@ def get_current_user(
     payload = verify_token(token, token_type="access")
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(User).filter(User.id == payload.get("sub")).first()
+    try:
+        user_id = UUID(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    user = get_cached_user(user_id)
+    if user is None:
+        async with ReadSessionLocal(user_id) as read_db:
+            user = await get_active_user(read_db, user_id)
+    if not user and replicas.urls:
+        user = await get_active_user(db, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
 
+async def get_read_db(user: CurrentUser = Depends(get_current_user)):
+    """
+    Dependency that provides a session for read-only queries of the current user,
+    on a healthy read replica unless the user wrote recently (see ReadSessionLocal).
+    """
+    async with ReadSessionLocal(user.id) as session:
+        yield session
+
+
 @router.get("/me")
-def get_current_user_profile(user: User = Depends(get_current_user)):
+def get_current_user_profile(user: CurrentUser = Depends(get_current_user)):
     """
     Returns the profile information of the currently authenticated user.
     """
@@ -94,10 +113,10 @@ def get_current_user_profile(user: User = Depends(get_current_user)):
 
 
 @router.put("/me")
-def update_current_user(
+async def update_current_user(
     update_data: UserUpdateRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Updates the profile information of the currently authenticated user.
@@ -112,7 +131,7 @@ def update_current_user(
         return {"id": current_user.id, "email": current_user.email,
                 "username": current_user.username, "full_name": current_user.full_name}
 
-    updated_user = update_user(db, current_user, update_dict)
+    updated_user = await update_user(db, current_user, update_dict)
 
     return {
         "id": updated_user.id,
@@ -121,3 +140,44 @@ def update_current_user(
         "full_name": updated_user.full_name,
         "message": "User updated successfully"
     }
+
+
+@router.delete("/me", status_code=204)
+async def deactivate_current_user(
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Deactivates the account of the currently authenticated user.
+    Existing tokens stop being accepted and the user can no longer log in.
+    """
+    await deactivate_user(db, current_user)
+    return
+
+
+@router.get("/me/usage", response_model=UsageResponse)
+async def get_current_user_usage(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Returns the token usage of the currently authenticated user per UTC day and in total.
+    Defaults to the last 30 days; 'start' and 'end' are inclusive ISO dates.
+    Raises HTTPException 400 if start is after end or the range exceeds a year.
+    """
+    end = end or utc_today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="'start' must not be after 'end'")
+    if (end - start).days > 366:
+        raise HTTPException(status_code=400, detail="Date range cannot exceed one year")
+    days = await get_usage(db, current_user, start, end)
+    return {
+        "start": start,
+        "end": end,
+        "prompts": sum(day.prompts for day in days),
+        "total_tokens": sum(day.total_tokens for day in days),
+        "days": days,
+    }
@@ -1,98 +1,411 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+import hashlib
+import json
+import orjson
+from contextlib import aclosing
+from typing import AsyncIterator, Literal, Optional, Union
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from fastapi import Query
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.prompt import PromptRequest, PromptResponse
-from app.services.prompt_service import improve_prompt
-from app.api.auth import get_current_user
-from app.models.user import User
-from app.db.session import SessionLocal
+from app.services.prompt_service import (
+    improve_prompt, improve_prompts_batch, stream_improve_prompt, stream_regenerate_prompt,
+    PROMPT_PAGE_SIZE, PROMPT_MAX_PAGE_SIZE,
+    PROMPT_PROJECTION_FIELDS, PROMPT_SUMMARY_FIELDS, route_prompt
+)
+from app.models.prompt import Prompt
+from app.api.auth import get_current_user, get_read_db
+from app.schemas.auth import CurrentUser
+from app.db.session import get_db
 from uuid import UUID
-from app.schemas.prompt import PromptListResponse, PromptRequest
+from app.schemas.prompt import (
+    PromptListResponse, PromptBatchRequest, PromptBatchResponse, PromptSearchResponse,
+    PromptJobResponse, PromptImportResponse, PromptBulkRequest, PromptBulkResponse
+)
 from app.services.prompt_service import (
     list_prompts, get_prompt_by_id, regenerate_prompt, delete_prompt,
-    toggle_favorite_prompt, list_favorite_prompts
+    toggle_favorite_prompt, list_favorite_prompts, search_prompts, list_prompt_fields,
+    get_prompt_version, export_prompts, import_prompts, bulk_update_prompts,
+    PROMPT_BULK_MAX_SIZE
 )
+from app.services.job_service import enqueue_prompt_job, get_prompt_job
+from app.core.config import get_settings
 from app.core.rate_limiter import limiter
 
 router = APIRouter(prefix="/prompt", tags=["Prompt"])
 
 PROMPT_RATE_LIMIT = "200 per hour"
 PROMPT_WRITE_RATE_LIMIT = "100 per hour"
+PROMPT_TRANSFER_RATE_LIMIT = "10 per hour"
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _parse_projection(view: str, fields: Optional[str]) -> Optional[list[str]]:
+    """
+    Resolves the 'view' and 'fields' query parameters of the list endpoints into the
+    list of fields to select, or None for the full PromptResponse representation.
+    Raises HTTPException 400 for unknown fields.
+    """
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = sorted(set(requested) - set(PROMPT_PROJECTION_FIELDS))
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown) or fields}")
+        return list(dict.fromkeys(requested))
+    if view == "summary":
+        return PROMPT_SUMMARY_FIELDS
+    return None
+
+
+def _etag(version: int, *parts) -> str:
+    """
+    Builds a weak ETag from the user's prompt version and the parameters that shape
+    the representation, so different pages or projections never share a tag.
+    """
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """
+    Returns True if the request's If-None-Match header matches etag using the weak
+    comparison that RFC 9110 prescribes for If-None-Match.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/")
+               for tag in header.split(","))
+
+
+async def _conditional(request: Request, db: AsyncSession, user: CurrentUser, *parts) -> tuple[str, Optional[Response]]:
+    """
+    Computes the ETag of a prompt read and, if the client already holds it,
+    the 304 response to return before anything is loaded.
+    """
+    etag = _etag(await get_prompt_version(db, user), user.id, *parts)
+    if _not_modified(request, etag):
+        return etag, Response(status_code=304, headers=_cache_headers(etag))
+    return etag, None
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _json(content, headers: dict) -> Response:
+    # Serialized directly with orjson, which handles UUIDs and datetimes natively and
+    # skips the response model validation the plain projected rows do not need.
+    return Response(orjson.dumps(content), media_type="application/json", headers=headers)
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def _event_stream(events: AsyncIterator[tuple[str, Union[str, Prompt]]]) -> StreamingResponse:
+    """
+    Wraps a prompt optimization event iterator into a Server-Sent Events response.
+    Emits 'token' events with content deltas, a final 'done' event with the stored
+    prompt, or an 'error' event if the upstream call fails mid-stream.
+    When the client disconnects the iterator is closed, which cancels the upstream call.
+    """
+    async def body():
+        async with aclosing(events):
+            try:
+                async for event, data in events:
+                    if event == "done":
+                        yield _sse(event, PromptResponse.model_validate(data, from_attributes=True).model_dump_json())
+                    else:
+                        yield _sse(event, json.dumps({"content": data}))
+            except Exception as e:
+                yield _sse("error", json.dumps({"detail": str(e)}))
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @router.get("/", response_model=PromptListResponse)
 @limiter.limit(PROMPT_RATE_LIMIT)
-def list_user_prompts(request: Request, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def list_user_prompts(
+    request: Request,
+    response: Response,
+    limit: int = Query(PROMPT_PAGE_SIZE, ge=1, le=PROMPT_MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    view: Literal["full", "summary"] = Query("full"),
+    fields: Optional[str] = Query(None),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    Returns a list of all prompts created by the authenticated user.
+    Returns a page of prompts created by the authenticated user, newest first.
+    Pass the returned 'next_cursor' as 'after' to fetch the following page.
+    'view=summary' returns only id, a 100-character preview, created_at and is_favorite;
+    'fields' selects a comma-separated subset of fields instead.
+    Responses carry a weak ETag; a matching If-None-Match returns 304 without loading the list.
     """
-    prompts = list_prompts(db, user)
-    return {"prompts": prompts}
+    projection = _parse_projection(view, fields)
+    etag, not_modified = await _conditional(request, db, user, "list", limit, after, projection)
+    if not_modified:
+        return not_modified
+    if projection:
+        prompts, next_cursor = await list_prompt_fields(db, user, projection, False, limit, after)
+        return _json({"prompts": prompts, "next_cursor": next_cursor}, _cache_headers(etag))
+    prompts, next_cursor = await list_prompts(db, user, limit, after)
+    response.headers.update(_cache_headers(etag))
+    return {"prompts": prompts, "next_cursor": next_cursor}
 
 
 @router.get("/favorites", response_model=PromptListResponse)
 @limiter.limit(PROMPT_RATE_LIMIT)
-def get_favorites(request: Request, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_favorites(
+    request: Request,
+    response: Response,
+    limit: int = Query(PROMPT_PAGE_SIZE, ge=1, le=PROMPT_MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    view: Literal["full", "summary"] = Query("full"),
+    fields: Optional[str] = Query(None),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    Returns a list of all favorite prompts for the authenticated user.
+    Returns a page of favorite prompts for the authenticated user, newest first.
+    Pass the returned 'next_cursor' as 'after' to fetch the following page.
+    Accepts the same 'view' and 'fields' options and ETag handling as the prompt list.
     """
-    prompts = list_favorite_prompts(db, user)
-    return {"prompts": prompts}
+    projection = _parse_projection(view, fields)
+    etag, not_modified = await _conditional(request, db, user, "favorites", limit, after, projection)
+    if not_modified:
+        return not_modified
+    if projection:
+        prompts, next_cursor = await list_prompt_fields(db, user, projection, True, limit, after)
+        return _json({"prompts": prompts, "next_cursor": next_cursor}, _cache_headers(etag))
+    prompts, next_cursor = await list_favorite_prompts(db, user, limit, after)
+    response.headers.update(_cache_headers(etag))
+    return {"prompts": prompts, "next_cursor": next_cursor}
+
+
+@router.get("/search", response_model=PromptSearchResponse)
+@limiter.limit(PROMPT_RATE_LIMIT)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(PROMPT_PAGE_SIZE, ge=1, le=PROMPT_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Full-text search over the authenticated user's prompts, best matches first.
+    Each result includes its rank and the matching fragments with <mark> highlights.
+    Pass the returned 'next_offset' as 'offset' to fetch the following page.
+    """
+    results, next_offset = await search_prompts(db, user, q, limit, offset)
+    return {
+        "results": [
+            {**PromptResponse.model_validate(prompt, from_attributes=True).model_dump(),
+             "rank": rank, "highlights": highlights}
+            for prompt, rank, highlights in results
+        ],
+        "next_offset": next_offset,
+    }
+
+
+@router.get("/export")
+@limiter.limit(PROMPT_TRANSFER_RATE_LIMIT)
+async def export(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Streams the authenticated user's whole prompt history, newest first, as
+    newline-delimited JSON or CSV.
+    """
+    return StreamingResponse(
+        await export_prompts(db, user, format), media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="prompts.{format}"'})
+
+
+@router.post("/import", response_model=PromptImportResponse)
+@limiter.limit(PROMPT_TRANSFER_RATE_LIMIT)
+async def import_history(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Imports prompts from a raw NDJSON or CSV request body in the /export layout.
+    Only original_prompt is required; ids are ignored and new ones are assigned.
+    Raises HTTPException 400 for malformed records and 413 for oversized uploads.
+    """
+    return {"imported": await import_prompts(db, user, request.stream(), format)}
 
 
 @router.get("/{prompt_id}", response_model=PromptResponse)
 @limiter.limit(PROMPT_RATE_LIMIT)
-def get_prompt(request: Request, prompt_id: UUID, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_prompt(request: Request, response: Response, prompt_id: UUID, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
     """
     Retrieves a specific prompt by its ID for the authenticated user.
+    Responses carry a weak ETag; a matching If-None-Match returns 304 without loading the prompt.
     """
-    return get_prompt_by_id(db, user, prompt_id)
+    etag, not_modified = await _conditional(request, db, user, "prompt", prompt_id)
+    if not_modified:
+        return not_modified
+    prompt = await get_prompt_by_id(db, user, prompt_id)
+    response.headers.update(_cache_headers(etag))
+    return prompt
 
 
 @router.post("/{prompt_id}/regenerate", response_model=PromptResponse)
 @limiter.limit(PROMPT_WRITE_RATE_LIMIT)
-def regenerate(request: Request, prompt_id: UUID, body: PromptRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def regenerate(request: Request, prompt_id: UUID, body: PromptRequest, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """
     Regenerates an optimized prompt and explanation for a given prompt ID using new text.
     """
-    return regenerate_prompt(db, user, prompt_id, body.prompt)
+    return await regenerate_prompt(db, user, prompt_id, body.prompt)
+
+
+@router.post("/{prompt_id}/regenerate/stream")
+@limiter.limit(PROMPT_WRITE_RATE_LIMIT)
+async def regenerate_stream(request: Request, prompt_id: UUID, body: PromptRequest, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Streaming variant of /regenerate.
+    Forwards the model output as Server-Sent Events and stores the regenerated prompt when it completes.
+    """
+    return _event_stream(await stream_regenerate_prompt(db, user, prompt_id, body.prompt))
 
 
 @router.delete("/{prompt_id}", status_code=204)
 @limiter.limit(PROMPT_WRITE_RATE_LIMIT)
-async def delete(request: Request, prompt_id: UUID, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def delete(request: Request, prompt_id: UUID, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """
     Deletes a prompt by its ID for the authenticated user.
     """
-    delete_prompt(db, user, prompt_id)
+    await delete_prompt(db, user, prompt_id)
     return
 
 
-@router.post("/improve", response_model=PromptResponse)
+def _job_response(job, prompt: Optional[Prompt] = None) -> dict:
+    return {
+        **PromptJobResponse.model_validate(job, from_attributes=True).model_dump(exclude={"prompt"}),
+        "prompt": prompt,
+    }
+
+
+@router.post("/improve", response_model=PromptResponse,
+             responses={202: {"model": PromptJobResponse, "description": "Job queued (mode=async)"}})
 @limiter.limit(PROMPT_WRITE_RATE_LIMIT)
-def improve(request: Request, prompt: PromptRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def improve(
+    request: Request,
+    prompt: PromptRequest,
+    mode: Literal["sync", "async"] = Query("sync"),
+    priority: int = Query(0, ge=0, le=9),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     """
     Improves a given prompt using AI and returns the optimized prompt and explanation.
+    With 'mode=async' the work is queued instead and 202 is returned right away with
+    the job; poll GET /prompt/jobs/{job_id} for the result. Queued jobs are served
+    fairly across users; among them, higher 'priority' jobs run first.
+    Raises HTTPException if the prompt is empty or too long.
+    """
+    if not prompt.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+    if mode == "async":
+        # Reject oversized prompts now rather than from the worker.
+        route_prompt(prompt.prompt)
+        job = await enqueue_prompt_job(db, user, prompt.prompt, priority)
+        return JSONResponse(
+            PromptJobResponse.model_validate(job, from_attributes=True).model_dump(mode="json"),
+            status_code=202, headers={"Location": f"/prompt/jobs/{job.id}"})
+    return await improve_prompt(user, prompt.prompt, db)
+
+
+@router.get("/jobs/{job_id}", response_model=PromptJobResponse)
+@limiter.limit(PROMPT_RATE_LIMIT)
+async def get_job(request: Request, job_id: UUID, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Returns the status of a queued improvement job and, once it has succeeded, the stored prompt.
+    """
+    job, prompt = await get_prompt_job(db, user, job_id)
+    return _job_response(job, prompt)
+
+
+def _validated_batch(request: Request, body: PromptBatchRequest) -> PromptBatchRequest:
+    """
+    Dependency that checks the batch size before the rate limit is applied and
+    records it for _batch_cost.
+    Raises HTTPException if the batch is empty or larger than IMPROVE_BATCH_MAX_SIZE.
+    """
+    if not body.prompts:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(body.prompts) > get_settings().improve_batch_max_size:
+        raise HTTPException(
+            status_code=400, detail=f"Batch cannot contain more than {get_settings().improve_batch_max_size} prompts")
+    request.state.batch_size = len(body.prompts)
+    return body
+
+
+def _batch_cost(request: Request) -> int:
+    return getattr(request.state, "batch_size", 1)
+
+
+@router.post("/improve/batch", response_model=PromptBatchResponse)
+@limiter.limit(PROMPT_WRITE_RATE_LIMIT, cost=_batch_cost)
+async def improve_batch(request: Request, body: PromptBatchRequest = Depends(_validated_batch), user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Improves a list of prompts in one request with bounded upstream concurrency.
+    Every prompt counts as one improvement against the write rate limit.
+    Returns one result per prompt, in order, with either the stored prompt or an error.
+    Raises HTTPException if the batch is empty or larger than IMPROVE_BATCH_MAX_SIZE.
+    """
+    results = await improve_prompts_batch(user, body.prompts, db)
+    return {"results": [{"index": index, "prompt": prompt, "error": error}
+                        for index, (prompt, error) in enumerate(results)]}
+
+
+@router.post("/bulk", response_model=PromptBulkResponse)
+@limiter.limit(PROMPT_WRITE_RATE_LIMIT)
+async def bulk(request: Request, body: PromptBulkRequest, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Favorites, unfavorites or deletes several prompts of the authenticated user at once.
+    Returns the IDs that were changed; unknown IDs are ignored.
+    Raises HTTPException if the list is empty or larger than PROMPT_BULK_MAX_SIZE.
+    """
+    if not body.ids:
+        raise HTTPException(status_code=400, detail="IDs cannot be empty")
+    if len(body.ids) > PROMPT_BULK_MAX_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"Cannot change more than {PROMPT_BULK_MAX_SIZE} prompts at once")
+    ids = await bulk_update_prompts(db, user, body.ids, body.action)
+    return {"action": body.action, "ids": ids}
+
+
+@router.post("/improve/stream")
+@limiter.limit(PROMPT_WRITE_RATE_LIMIT)
+async def improve_stream(request: Request, prompt: PromptRequest, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Streaming variant of /improve.
+    Forwards the model output as Server-Sent Events and stores the prompt when it completes.
     Raises HTTPException if the prompt is empty.
     """
     if not prompt.prompt.strip():
         raise HTTPException(status_code=400, detail="Prompt cannot be empty")
-    return improve_prompt(user, prompt.prompt, db)
+    return _event_stream(await stream_improve_prompt(user, prompt.prompt, db))
 
 
 @router.post("/{prompt_id}/favorite", response_model=PromptResponse)
 @limiter.limit(PROMPT_WRITE_RATE_LIMIT)
-def toggle_favorite(request: Request, prompt_id: UUID, favorite: bool = Query(True), user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def toggle_favorite(request: Request, prompt_id: UUID, favorite: bool = Query(True), user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """
     Sets or unsets a prompt as favorite for the authenticated user.
     Returns the updated prompt.
     """
-    return toggle_favorite_prompt(db, user, prompt_id, favorite)
+    return await toggle_favorite_prompt(db, user, prompt_id, favorite)
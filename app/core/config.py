@@ -0,0 +1,165 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
+
+
+def _bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() == "true"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Application configuration, read once from the environment (and .env).
+    See the README for what each setting does.
+    """
+    database_url: Optional[str]
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+    database_replica_urls: tuple[str, ...]
+    # Replicas further behind than this serve no reads until they catch up.
+    db_replica_max_lag_seconds: float
+    db_replica_check_seconds: float
+
+    secret_key: Optional[str]
+    token_cache_size: int
+    user_cache_size: int
+    user_cache_ttl_seconds: int
+    bcrypt_rounds: int
+    # 0 runs bcrypt on the default thread pool instead (bcrypt releases the GIL while hashing).
+    password_hash_workers: int
+
+    # Shared by every worker on the host; use memory:// for per-process counters.
+    rate_limit_storage_uri: str
+    # Load tests run every virtual user from one address; they switch limits off.
+    rate_limit_enabled: bool
+
+    openai_api_key: Optional[str]
+    # Overrides the API endpoint, e.g. to point at benchmarks/fake_openai.py.
+    openai_base_url: Optional[str]
+    openai_max_connections: int
+    openai_max_keepalive_connections: int
+    # Deadline of a single attempt; streamed calls apply it to each read instead.
+    openai_timeout_seconds: float
+    openai_connect_timeout_seconds: float
+    openai_max_retries: int
+    openai_retry_base_delay: float
+    openai_retry_max_delay: float
+    openai_circuit_failure_threshold: int
+    openai_circuit_reset_seconds: float
+    # Hedging sends a duplicate request (and pays its tokens) when the first one is
+    # slower than this percentile of recent calls.
+    openai_hedge_enabled: bool
+    openai_hedge_percentile: float
+    openai_hedge_min_delay: float
+
+    optimization_cache_size: int
+    optimization_cache_ttl_seconds: int
+    optimization_cache_db_ttl_seconds: int
+    # Model tiers as "model:max_input_tokens" pairs; a prompt goes to the first tier it fits.
+    prompt_model_tiers: str
+    # What to do with prompts larger than the last tier: "reject" (413) or "truncate".
+    prompt_oversize_policy: str
+    improve_batch_max_size: int
+    improve_batch_concurrency: int
+    prompt_import_max_rows: int
+    prompt_similarity_enabled: bool
+    # Minimum share of the 64 SimHash bits two prompts must agree on to reuse an
+    # optimization. The index always finds matches up to 3 differing bits (0.95);
+    # the default 0.9 (6 bits) finds most of them.
+    prompt_similarity_threshold: float
+    # Each indexed prompt takes about 0.4 KB per worker.
+    prompt_similarity_max_entries: int
+
+    # 0 disables the job workers in this process (e.g. to run them in a dedicated deployment).
+    prompt_job_workers: int
+    prompt_job_poll_seconds: float
+    prompt_job_lease_seconds: int
+    prompt_job_max_attempts: int
+    prompt_job_max_per_user: int
+
+    prometheus_multiproc_dir: Optional[str]
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()
+        return cls(
+            database_url=os.getenv("DATABASE_URL"),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            db_pool_pre_ping=_bool("DB_POOL_PRE_PING", "true"),
+            database_replica_urls=tuple(
+                url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()),
+            db_replica_max_lag_seconds=float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5")),
+            db_replica_check_seconds=float(os.getenv("DB_REPLICA_CHECK_SECONDS", "5")),
+
+            secret_key=os.getenv("SECRET_KEY"),
+            token_cache_size=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+            user_cache_size=int(os.getenv("USER_CACHE_SIZE", "10000")),
+            user_cache_ttl_seconds=int(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+            bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+            password_hash_workers=int(
+                os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1))),
+
+            rate_limit_storage_uri=os.getenv(
+                "RATE_LIMIT_STORAGE_URI",
+                "sqlite:///" + os.path.join(tempfile.gettempdir(), "promptlazy-ratelimit.db")),
+            rate_limit_enabled=_bool("RATE_LIMIT_ENABLED", "true"),
+
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            openai_base_url=os.getenv("OPENAI_BASE_URL"),
+            openai_max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "1000")),
+            openai_max_keepalive_connections=int(
+                os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "100")),
+            openai_timeout_seconds=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60")),
+            openai_connect_timeout_seconds=float(
+                os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5")),
+            openai_max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+            openai_retry_base_delay=float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5")),
+            openai_retry_max_delay=float(os.getenv("OPENAI_RETRY_MAX_DELAY", "8")),
+            openai_circuit_failure_threshold=int(
+                os.getenv("OPENAI_CIRCUIT_FAILURE_THRESHOLD", "5")),
+            openai_circuit_reset_seconds=float(
+                os.getenv("OPENAI_CIRCUIT_RESET_SECONDS", "30")),
+            openai_hedge_enabled=_bool("OPENAI_HEDGE_ENABLED", "false"),
+            openai_hedge_percentile=float(os.getenv("OPENAI_HEDGE_PERCENTILE", "95")),
+            openai_hedge_min_delay=float(os.getenv("OPENAI_HEDGE_MIN_DELAY", "1")),
+
+            optimization_cache_size=int(os.getenv("OPTIMIZATION_CACHE_SIZE", "1024")),
+            optimization_cache_ttl_seconds=int(
+                os.getenv("OPTIMIZATION_CACHE_TTL_SECONDS", "3600")),
+            optimization_cache_db_ttl_seconds=int(
+                os.getenv("OPTIMIZATION_CACHE_DB_TTL_SECONDS", str(7 * 24 * 3600))),
+            prompt_model_tiers=os.getenv("PROMPT_MODEL_TIERS", "gpt-4o-mini:300,gpt-4:6000"),
+            prompt_oversize_policy=os.getenv("PROMPT_OVERSIZE_POLICY", "reject"),
+            improve_batch_max_size=int(os.getenv("IMPROVE_BATCH_MAX_SIZE", "32")),
+            improve_batch_concurrency=int(os.getenv("IMPROVE_BATCH_CONCURRENCY", "8")),
+            prompt_import_max_rows=int(os.getenv("PROMPT_IMPORT_MAX_ROWS", "100000")),
+            prompt_similarity_enabled=_bool("PROMPT_SIMILARITY_ENABLED", "true"),
+            prompt_similarity_threshold=float(os.getenv("PROMPT_SIMILARITY_THRESHOLD", "0.9")),
+            prompt_similarity_max_entries=int(os.getenv("PROMPT_SIMILARITY_MAX_ENTRIES", "250000")),
+
+            prompt_job_workers=int(os.getenv("PROMPT_JOB_WORKERS", "4")),
+            prompt_job_poll_seconds=float(os.getenv("PROMPT_JOB_POLL_SECONDS", "1")),
+            prompt_job_lease_seconds=int(os.getenv("PROMPT_JOB_LEASE_SECONDS", "300")),
+            prompt_job_max_attempts=int(os.getenv("PROMPT_JOB_MAX_ATTEMPTS", "3")),
+            prompt_job_max_per_user=int(os.getenv("PROMPT_JOB_MAX_PER_USER", "2")),
+
+            prometheus_multiproc_dir=os.getenv("PROMETHEUS_MULTIPROC_DIR"),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Returns the process-wide Settings, loading .env and the environment on first use.
+    """
+    return Settings.from_env()
@@ -0,0 +1,208 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+from app.core.config import get_settings
+from app.core.metrics import (
+    record_openai_call, record_openai_error, record_openai_hedge, record_openai_retry,
+    record_openai_usage
+)
+from app.core.resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, backoff_delay, hedged
+)
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# The openai SDK (and httpx) are imported on first use; importing them takes a
+# noticeable share of the app's cold start.
+settings = get_settings()
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_client: Optional["AsyncOpenAI"] = None
+_breaker = CircuitBreaker(settings.openai_circuit_failure_threshold,
+                          settings.openai_circuit_reset_seconds)
+_latencies = LatencyTracker()
+
+
+class LLMError(Exception):
+    """
+    Raised when a completion cannot be obtained from the upstream API.
+    status_code is the HTTP status the API should answer with and retry_after, when
+    set, the number of seconds clients should wait before trying again.
+    """
+
+    def __init__(self, message: str, status_code: int = 502, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    def __init__(self, message: str):
+        super().__init__(message, status_code=504)
+
+
+class LLMUnavailableError(LLMError):
+    def __init__(self, retry_after: float):
+        super().__init__("OpenAI API is temporarily unavailable",
+                         status_code=503, retry_after=retry_after)
+
+
+def get_openai_client() -> "AsyncOpenAI":
+    """
+    Returns the process-wide AsyncOpenAI client, creating it on first use.
+    The client owns a pooled HTTP connection so concurrent completions reuse
+    keep-alive connections instead of opening a new one per request.
+    """
+    global _client
+    if _client is None:
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            timeout=httpx.Timeout(settings.openai_timeout_seconds,
+                                  connect=settings.openai_connect_timeout_seconds),
+            # Retries are handled by create_chat_completion, which also feeds the breaker.
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_keepalive_connections,
+                )
+            ),
+        )
+    return _client
+
+
+async def close_openai_client():
+    """
+    Closes the shared AsyncOpenAI client and its connection pool, if it was created.
+    """
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+    if isinstance(error, (asyncio.TimeoutError, APITimeoutError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    from openai import APIStatusError
+
+    if isinstance(error, APIStatusError):
+        try:
+            return float(error.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _is_timeout(error: BaseException) -> bool:
+    from openai import APITimeoutError
+
+    return isinstance(error, (asyncio.TimeoutError, APITimeoutError))
+
+
+def _hedge_delay(stream: bool) -> Optional[float]:
+    if stream or not settings.openai_hedge_enabled:
+        return None
+    p = _latencies.percentile(settings.openai_hedge_percentile)
+    return max(p, settings.openai_hedge_min_delay) if p is not None else None
+
+
+async def create_chat_completion(model: str, messages: list[dict], **kwargs):
+    """
+    Sends a chat completion request through the shared AsyncOpenAI client.
+    Each attempt has a deadline of OPENAI_TIMEOUT_SECONDS; timeouts, connection errors,
+    429 and 5xx responses are retried up to OPENAI_MAX_RETRIES times with jittered
+    exponential backoff (honouring Retry-After). Consecutive failures open a circuit
+    breaker that fails fast until OPENAI_CIRCUIT_RESET_SECONDS pass. When hedging is
+    enabled, a non-streamed attempt slower than the recent latency percentile is
+    raced against a second identical request.
+    Returns the raw completion response (or stream, when stream=True is passed).
+    Raises LLMUnavailableError while the circuit is open, LLMTimeoutError if the last
+    attempt timed out and LLMError for any other upstream failure.
+    Records call latency, errors, retries and, for non-streamed calls, token usage
+    metrics; streamed calls report their usage from the final chunk.
+    """
+    client = get_openai_client()
+    stream = bool(kwargs.get("stream"))
+
+    async def attempt():
+        return await asyncio.wait_for(
+            client.chat.completions.create(model=model, messages=messages, **kwargs),
+            settings.openai_timeout_seconds)
+
+    for retry in range(settings.openai_max_retries + 1):
+        try:
+            _breaker.before_call()
+        except CircuitOpenError as e:
+            raise LLMUnavailableError(e.retry_after) from None
+        start = time.perf_counter()
+        try:
+            response = await hedged(attempt, _hedge_delay(stream),
+                                    lambda: record_openai_hedge(model))
+        except asyncio.CancelledError:
+            _breaker.release()
+            raise
+        except Exception as e:
+            record_openai_error(model, e)
+            if not _is_retryable(e):
+                _breaker.release()
+                raise LLMError(f"OpenAI API error: {e}") from e
+            _breaker.record_failure()
+            if retry == settings.openai_max_retries or _breaker.state != "closed":
+                if _is_timeout(e):
+                    raise LLMTimeoutError("OpenAI API timed out") from e
+                raise LLMError(f"OpenAI API error: {e}") from e
+            record_openai_retry(model)
+            delay = backoff_delay(retry, settings.openai_retry_base_delay, settings.openai_retry_max_delay)
+            await asyncio.sleep(min(max(delay, _retry_after(e) or 0), settings.openai_retry_max_delay))
+            continue
+        elapsed = time.perf_counter() - start
+        _breaker.record_success()
+        _latencies.record(elapsed)
+        record_openai_call(model, stream, elapsed)
+        if not stream:
+            record_openai_usage(model, response.usage)
+        return response
+
+
+async def iterate_stream(stream, model: str) -> AsyncIterator:
+    """
+    Yields the chunks of a streamed completion, recording its token usage.
+    Raises LLMError if the upstream connection fails mid-stream.
+    """
+    import httpx
+    from openai import OpenAIError
+
+    try:
+        async for chunk in stream:
+            if chunk.usage:
+                record_openai_usage(model, chunk.usage)
+            yield chunk
+    except (OpenAIError, httpx.HTTPError) as e:
+        record_openai_error(model, e)
+        raise LLMError(f"OpenAI API error: {e}") from e
+
+
+def get_llm_status() -> dict:
+    """
+    Returns the circuit breaker state and the hedging threshold of this worker.
+    """
+    return {
+        "circuit": _breaker.state,
+        "consecutive_failures": _breaker.failures,
+        "hedging": settings.openai_hedge_enabled,
+        "hedge_after_seconds": _hedge_delay(False),
+        "latency_p95_seconds": _latencies.percentile(95),
+    }
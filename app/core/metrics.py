@@ -0,0 +1,222 @@
+import time
+from typing import Callable
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from fastapi import Request, Response
+from sqlalchemy import event
+from app.core.config import get_settings
+
+UNMATCHED_ROUTE = "<unmatched>"
+QUERY_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ["method", "route", "status"])
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled")
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_jobs_in_flight", "Password hashing jobs running or waiting for a worker")
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter",
+    ["route", "limit"])
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Database statement execution time by operation",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+OPENAI_REQUEST_DURATION = Histogram(
+    "openai_request_duration_seconds",
+    "OpenAI chat completion latency (time to first byte for streamed calls)",
+    ["model", "stream"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120))
+OPENAI_ERRORS = Counter(
+    "openai_errors_total", "Failed OpenAI chat completion calls by exception type",
+    ["model", "error"])
+OPENAI_RETRIES = Counter(
+    "openai_retries_total", "OpenAI chat completion attempts retried after a failure",
+    ["model"])
+OPENAI_HEDGES = Counter(
+    "openai_hedged_requests_total", "Duplicate OpenAI requests sent to cut tail latency",
+    ["model"])
+OPENAI_TOKENS = Histogram(
+    "openai_tokens", "Tokens used per OpenAI chat completion",
+    ["model", "kind"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000))
+
+# Label children are bound once per label set and reused, so the hot path is a dict
+# lookup plus the observation itself.
+_http_children: dict[tuple[str, str, int], tuple] = {}
+_query_children = {operation: DB_QUERY_DURATION.labels(operation)
+                   for operation in (*QUERY_OPERATIONS, "OTHER")}
+
+
+def _http_metrics(method: str, route: str, status: int):
+    key = (method, route, status)
+    children = _http_children.get(key)
+    if children is None:
+        children = _http_children[key] = (
+            HTTP_REQUESTS.labels(method, route, str(status)),
+            HTTP_REQUEST_DURATION.labels(method, route),
+        )
+    return children
+
+
+def route_template(scope: dict) -> str:
+    """
+    Returns the path template of the route that handled the request (e.g.
+    /prompt/{prompt_id}), so metrics are not labelled with raw, unbounded paths.
+    """
+    return getattr(scope.get("route"), "path_format", None) or UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests per route
+    template. Must be the outermost middleware so the route resolved by the router is
+    visible in the shared scope once the response has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            requests, duration = _http_metrics(scope["method"], route_template(scope), status)
+            requests.inc()
+            duration.observe(elapsed)
+
+
+def record_rate_limit_rejection(request: Request, limit: str):
+    RATE_LIMIT_REJECTIONS.labels(route_template(request.scope), limit).inc()
+
+
+def record_openai_call(model: str, stream: bool, seconds: float):
+    OPENAI_REQUEST_DURATION.labels(model, "true" if stream else "false").observe(seconds)
+
+
+def record_openai_error(model: str, error: BaseException):
+    OPENAI_ERRORS.labels(model, type(error).__name__).inc()
+
+
+def record_openai_retry(model: str):
+    OPENAI_RETRIES.labels(model).inc()
+
+
+def record_openai_hedge(model: str):
+    OPENAI_HEDGES.labels(model).inc()
+
+
+def record_openai_usage(model: str, usage):
+    """
+    Records the prompt, completion and total token counts of a completion's usage block.
+    """
+    if usage is None:
+        return
+    OPENAI_TOKENS.labels(model, "prompt").observe(usage.prompt_tokens or 0)
+    OPENAI_TOKENS.labels(model, "completion").observe(usage.completion_tokens or 0)
+    OPENAI_TOKENS.labels(model, "total").observe(usage.total_tokens or 0)
+
+
+def instrument_engine(engine):
+    """
+    Records the execution time of every statement run through the engine, labelled
+    by its SQL operation.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        operation = statement.lstrip()[:6].upper()
+        _query_children.get(operation, _query_children["OTHER"]).observe(elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+
+class PoolCollector:
+    """
+    Exposes the connection pool occupancy and checkout wait statistics reported by
+    get_status (see app.db.session.get_pool_status) at scrape time.
+    """
+
+    def __init__(self, get_status: Callable[[], dict]):
+        self.get_status = get_status
+
+    def describe(self):
+        # Without describe() the registry calls collect() on registration, which would
+        # create the database engine (and load its driver) when the app is imported.
+        yield GaugeMetricFamily("db_pool_connections", "Database pool connections by state", labels=["state"])
+        yield GaugeMetricFamily("db_pool_size", "Configured database pool size")
+        yield CounterMetricFamily("db_pool_checkouts", "Database pool connection checkouts")
+        yield CounterMetricFamily(
+            "db_pool_checkout_wait_seconds", "Total time spent waiting for a pool connection")
+        yield GaugeMetricFamily("db_pool_checkout_wait_seconds_max", "Longest wait for a pool connection")
+
+    def collect(self):
+        status = self.get_status()
+        connections = GaugeMetricFamily(
+            "db_pool_connections", "Database pool connections by state", labels=["state"])
+        for state in ("checked_in", "checked_out", "overflow"):
+            if state in status:
+                connections.add_metric([state], status[state])
+        yield connections
+        if "size" in status:
+            yield GaugeMetricFamily("db_pool_size", "Configured database pool size", value=status["size"])
+        yield CounterMetricFamily(
+            "db_pool_checkouts", "Database pool connection checkouts", value=status["checkouts"])
+        yield CounterMetricFamily(
+            "db_pool_checkout_wait_seconds", "Total time spent waiting for a pool connection",
+            value=status["checkout_wait_seconds_total"])
+        yield GaugeMetricFamily(
+            "db_pool_checkout_wait_seconds_max", "Longest wait for a pool connection",
+            value=status["checkout_wait_seconds_max"])
+
+
+def register_pool_collector(get_status: Callable[[], dict]):
+    REGISTRY.register(PoolCollector(get_status))
+
+
+def metrics_response() -> Response:
+    """
+    Renders all metrics in the Prometheus text format. When PROMETHEUS_MULTIPROC_DIR
+    is set (several workers), the samples of every worker process are aggregated;
+    the pool collector is per process and is only exported in single-process mode.
+    """
+    if get_settings().prometheus_multiproc_dir:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
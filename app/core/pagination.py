@@ -0,0 +1,25 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    """
+    Encodes the (created_at, id) position of the last row of a page into an opaque cursor.
+    """
+    raw = json.dumps([created_at.isoformat(), str(item_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decodes a cursor produced by encode_cursor back into its (created_at, id) position.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,107 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+from app.core.config import get_settings
+from app.core.metrics import PASSWORD_HASH_IN_FLIGHT
+
+settings = get_settings()
+
+_executor: Optional[Executor] = None
+_in_flight = 0
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """
+    Returns the passlib CryptContext, building it (and importing passlib) on first use.
+    Hashes whose cost factor differs from BCRYPT_ROUNDS are flagged for rehash on login.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=settings.bcrypt_rounds,
+        bcrypt__min_rounds=settings.bcrypt_rounds,
+        bcrypt__max_rounds=settings.bcrypt_rounds,
+    )
+
+
+def _hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+def _get_executor() -> Optional[Executor]:
+    global _executor
+    if _executor is None and settings.password_hash_workers > 0:
+        _executor = ProcessPoolExecutor(max_workers=settings.password_hash_workers)
+    return _executor
+
+
+async def _run(fn, *args):
+    global _in_flight
+    _in_flight += 1
+    PASSWORD_HASH_IN_FLIGHT.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _in_flight -= 1
+        PASSWORD_HASH_IN_FLIGHT.dec()
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hashes a plain password using bcrypt in the password worker pool.
+    Returns the hashed password as a string.
+    """
+    return await _run(_hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a plain password against a hashed password in the password worker pool.
+    Returns True if the password matches, False otherwise.
+    """
+    return await _run(_verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Verifies a plain password and, if the stored hash uses an outdated scheme or cost
+    factor, computes a replacement hash in the same worker call.
+    Returns (is_valid, new_hash), where new_hash is None if no rehash is needed.
+    """
+    return await _run(_verify_and_update, plain_password, hashed_password)
+
+
+def get_password_pool_status() -> dict:
+    """
+    Returns the size of the password worker pool and how many hashing jobs are
+    running or waiting for a worker.
+    """
+    workers = settings.password_hash_workers
+    return {
+        "workers": workers,
+        "bcrypt_rounds": settings.bcrypt_rounds,
+        "in_flight": _in_flight,
+        "queued": max(0, _in_flight - workers) if workers else None,
+    }
+
+
+def shutdown_password_pool():
+    """
+    Shuts down the password worker processes, cancelling jobs that have not started.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
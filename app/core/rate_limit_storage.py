@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+import time
+from limits.storage import Storage
+
+PURGE_EVERY = 1000
+
+
+class SQLiteStorage(Storage):
+    """
+    Rate limit storage backed by a SQLite database in WAL mode.
+    Every worker on a host that points at the same file shares the same counters, and
+    counters survive worker restarts. Each hit is a single UPSERT ... RETURNING
+    statement, so concurrent workers only hold the write lock for microseconds.
+
+    Registered for URIs of the form sqlite:///relative/path.db or sqlite:////absolute/path.db.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        path = uri.split("://", 1)[1]
+        self.path = path[1:] if path.startswith("/") else path
+        self.timeout = float(options.get("timeout", 5))
+        self._local = threading.local()
+        self._hits = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        """
+        Increments the counter for key, starting a new window of expiry seconds if the
+        previous one has ended. Returns the counter value after the increment.
+        """
+        now = time.time()
+        connection = self._connection()
+        count = connection.execute(
+            "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "count = CASE WHEN rate_limits.expires_at <= ? THEN excluded.count "
+            "ELSE rate_limits.count + excluded.count END, "
+            "expires_at = CASE WHEN rate_limits.expires_at <= ? OR ? THEN excluded.expires_at "
+            "ELSE rate_limits.expires_at END "
+            "RETURNING count",
+            (key, amount, now + expiry, now, now, int(elastic_expiry)),
+        ).fetchone()[0]
+        self._hits += 1
+        if self._hits % PURGE_EVERY == 0:
+            connection.execute(
+                "DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        return count
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> int:
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        return int(row[0] if row else now)
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        return self._connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str):
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
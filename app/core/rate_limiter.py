@@ -1,8 +1,13 @@
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from app.core import rate_limit_storage  # noqa: F401  registers the sqlite:// storage scheme
+from app.core.config import get_settings
+
+settings = get_settings()
 
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["1000 per hour", "100 per minute"],
-    storage_uri="memory://"
+    storage_uri=settings.rate_limit_storage_uri,
+    enabled=settings.rate_limit_enabled
 )
@@ -0,0 +1,129 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised by CircuitBreaker.before_call while the circuit is open.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit open, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    After failure_threshold failures in a row the circuit opens and calls fail fast
+    for reset_seconds. Then a single probe call is let through (half-open): its
+    success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """
+        Raises CircuitOpenError if the call must not be attempted right now.
+        """
+        if self.opened_at is None:
+            return
+        remaining = self.opened_at + self.reset_seconds - time.monotonic()
+        if remaining > 0 or self._probing:
+            raise CircuitOpenError(max(remaining, 1.0))
+        self._probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """
+        Ends a half-open probe whose outcome says nothing about upstream health
+        (e.g. the request itself was invalid), leaving the state unchanged.
+        """
+        self._probing = False
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent successful call latencies to estimate a percentile.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Returns the p-th percentile of the window, or None until min_samples calls were seen.
+        """
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Returns the delay before retry number attempt (0-based) using exponential
+    backoff with full jitter.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def hedged(fn: Callable[[], Awaitable[T]], hedge_after: Optional[float], on_hedge: Optional[Callable[[], None]] = None) -> T:
+    """
+    Awaits fn() and, if it has not finished after hedge_after seconds, starts a second
+    fn() in parallel. Returns the first successful result and cancels the other call;
+    raises the last error if both fail. hedge_after=None disables hedging.
+    """
+    if hedge_after is None:
+        return await fn()
+    pending = {asyncio.ensure_future(fn())}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return done.pop().result()
+        if on_hedge:
+            on_hedge()
+        pending.add(asyncio.ensure_future(fn()))
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -1,21 +1,22 @@
-import os
+import hashlib
+import time
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from dotenv import load_dotenv
 from fastapi.security import APIKeyHeader
-import openai
+from app.core.cache import TTLCache
+from app.core.config import get_settings
 
-load_dotenv()
+settings = get_settings()
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 api_key_scheme = APIKeyHeader(name="Authorization")
 
+_verified_tokens = TTLCache(maxsize=settings.token_cache_size,
+                            ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 
 def create_access_token(data: dict):
     """
@@ -26,7 +27,7 @@ def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "type": "access"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
 
 
 def create_refresh_token(data: dict):
@@ -38,19 +39,30 @@ def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
 
 
 def verify_token(token: str, token_type: str = 'access'):
     """
     Verifies and decodes a JWT token.
     Checks if the token type matches ('access' or 'refresh').
+    Verified access tokens are memoized by digest until they expire, so a client
+    reusing its token skips signature verification. Refresh tokens are always decoded.
     Returns the payload if valid, otherwise None.
     """
+    if token_type == "access":
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        payload = _verified_tokens.get(digest)
+        if payload is not None:
+            return payload
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
         if payload.get("type") != token_type:
             raise JWTError("Invalid token type")
-        return payload
     except JWTError:
         return None
+    if token_type == "access" and "exp" in payload:
+        ttl = payload["exp"] - time.time()
+        if ttl > 0:
+            _verified_tokens.set(digest, payload, ttl=ttl)
+    return payload
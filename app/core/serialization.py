@@ -0,0 +1,112 @@
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Sequence
+from uuid import UUID
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_ndjson(fields: Sequence[str], rows: Iterable[Sequence]) -> str:
+    """
+    Renders rows as newline-delimited JSON objects keyed by fields.
+    """
+    return "".join(json.dumps(dict(zip(fields, row)), default=_json_default, ensure_ascii=False) + "\n"
+                   for row in rows)
+
+
+def to_csv(rows: Iterable[Sequence]) -> str:
+    """
+    Renders rows as CSV records; datetimes are written in ISO 8601 format.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([value.isoformat() if isinstance(value, datetime) else value for value in row]
+                     for row in rows)
+    return buffer.getvalue()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_length: int) -> AsyncIterator[str]:
+    """
+    Decodes a UTF-8 byte stream incrementally and yields its lines, including the
+    trailing newline, without holding more than one line in memory.
+    Raises ValueError if a line is longer than max_length characters or the stream
+    is not valid UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+            if len(pending) > max_length:
+                raise ValueError(f"Line is longer than {max_length} characters")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise ValueError("Upload is not valid UTF-8") from e
+    if pending:
+        yield pending
+
+
+async def iter_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict]]:
+    """
+    Parses newline-delimited JSON, skipping blank lines.
+    Yields (line number, object) pairs.
+    Raises ValueError for lines that are not JSON objects.
+    """
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number}: invalid JSON ({e.msg})") from e
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {number}: expected a JSON object")
+        yield number, record
+
+
+async def iter_csv(lines: AsyncIterator[str], max_length: int) -> AsyncIterator[tuple[int, dict]]:
+    """
+    Parses CSV with a header row, allowing quoted fields that span several lines.
+    Yields (line number, record) pairs keyed by the header's column names.
+    Raises ValueError for records longer than max_length characters or with more
+    fields than the header.
+    """
+    header = None
+    record, start, number = "", 0, 0
+    async for line in lines:
+        number += 1
+        if not record:
+            start = number
+        record += line
+        # Quotes inside quoted fields are doubled, so a record is complete once its
+        # quote count is even.
+        if record.count('"') % 2:
+            if len(record) > max_length:
+                raise ValueError(f"Line {start}: record is longer than {max_length} characters")
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) > len(header):
+            raise ValueError(f"Line {start}: expected {len(header)} fields, got {len(values)}")
+        yield start, dict(zip(header, values))
+    if record:
+        raise ValueError(f"Line {start}: unterminated quoted field")
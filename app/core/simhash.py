@@ -0,0 +1,117 @@
+import hashlib
+import re
+import struct
+from functools import lru_cache
+from typing import Generic, Hashable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+FINGERPRINT_BITS = 64
+_WORD = re.compile(r"\w+")
+# Every fingerprint bit gets a 32-bit counter lane; _BYTE_LANES[b] is byte b spread
+# over 8 lanes (bit i of b becomes a 1 in lane i), in little-endian bytes.
+_LANE_BYTES = 4
+_BYTE_LANES = [b"".join((value >> bit & 1).to_bytes(_LANE_BYTES, "little") for bit in range(8))
+               for value in range(256)]
+_LANES = struct.Struct(f"<{FINGERPRINT_BITS}I")
+
+
+@lru_cache(maxsize=1 << 16)
+def _feature_lanes(feature: str) -> int:
+    """
+    Returns the 64-bit hash of a feature spread over counter lanes: bit i of the
+    hash becomes a 1 in lane i. Summing these ints counts, per bit, how many
+    features have it set, with a single big-integer addition per feature.
+    Cached, since word features repeat heavily across prompts.
+    """
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=FINGERPRINT_BITS // 8).digest()
+    return int.from_bytes(b"".join(map(_BYTE_LANES.__getitem__, digest)), "little")
+
+
+def simhash(text: str) -> int:
+    """
+    Returns the 64-bit SimHash fingerprint of a text, built from its casefolded words
+    and word bigrams, so punctuation, casing and whitespace do not change it and
+    texts differing in a few words differ in a few bits.
+    """
+    words = _WORD.findall(text.casefold())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+    totals = sum(map(_feature_lanes, features))
+    counts = _LANES.unpack(totals.to_bytes(_LANES.size, "little"))
+    half = len(features) / 2
+    return sum(1 << bit for bit, count in enumerate(counts) if count > half)
+
+
+def similarity(a: int, b: int) -> float:
+    """
+    Returns the similarity of two fingerprints: the share of bits they agree on.
+    """
+    return 1 - (a ^ b).bit_count() / FINGERPRINT_BITS
+
+
+class SimHashIndex(Generic[T]):
+    """
+    Locality-sensitive index of SimHash fingerprints, partitioned by scope.
+    Fingerprints are split into bands; two fingerprints share a bucket when any band
+    is identical, so with 4 bands of 16 bits every fingerprint at most 3 bits away is
+    found, and farther ones with decreasing probability. A lookup only compares
+    against one bucket per band, about 4 * size / 2**16 entries.
+    """
+
+    def __init__(self, bands: int = 4):
+        self.bands = bands
+        self.band_bits = FINGERPRINT_BITS // bands
+        self._band_mask = (1 << self.band_bits) - 1
+        self._buckets: dict[int, list[tuple[int, Hashable, T]]] = {}
+        # Scopes are interned so entries of the same scope share one key object.
+        self._scopes: dict[Hashable, Hashable] = {}
+        self.size = 0
+
+    def _keys(self, fingerprint: int) -> Iterator[int]:
+        for band in range(self.bands):
+            yield band << self.band_bits | fingerprint >> (band * self.band_bits) & self._band_mask
+
+    def add(self, scope: Hashable, fingerprint: int, item: T):
+        entry = (fingerprint, self._scopes.setdefault(scope, scope), item)
+        for key in self._keys(fingerprint):
+            self._buckets.setdefault(key, []).append(entry)
+        self.size += 1
+
+    def discard(self, scope: Hashable, fingerprint: int, item: T):
+        """
+        Removes the entries of item stored under fingerprint, if any.
+        """
+        removed = False
+        for key in self._keys(fingerprint):
+            bucket = self._buckets.get(key, [])
+            kept = [entry for entry in bucket if entry != (fingerprint, scope, item)]
+            removed = removed or len(kept) < len(bucket)
+            if kept:
+                self._buckets[key] = kept
+            else:
+                self._buckets.pop(key, None)
+        if removed:
+            self.size -= 1
+
+    def query(self, scope: Hashable, fingerprint: int, max_distance: int) -> Iterator[tuple[int, T]]:
+        """
+        Yields the (fingerprint, item) of the scope's entries within max_distance bits
+        of fingerprint, closest first. Candidates are collected before the first one is
+        yielded, so callers may discard entries while iterating.
+        """
+        seen = set()
+        candidates = []
+        for key in self._keys(fingerprint):
+            for entry in self._buckets.get(key, ()):
+                candidate, candidate_scope, item = entry
+                if candidate_scope != scope or entry in seen:
+                    continue
+                seen.add(entry)
+                distance = (candidate ^ fingerprint).bit_count()
+                if distance <= max_distance:
+                    candidates.append((distance, candidate, item))
+        candidates.sort(key=lambda candidate: candidate[0])
+        for _, candidate, item in candidates:
+            yield candidate, item
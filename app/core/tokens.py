@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import math
+from typing import Iterable
+
+# Average characters per token of English text for OpenAI BPE vocabularies; used when
+# tiktoken is not installed, does not know the model or cannot load its vocabulary.
+CHARS_PER_TOKEN = 4
+FALLBACK_ENCODING = "cl100k_base"
+# tiktoken downloads vocabularies on first use (without a timeout) unless they are in
+# TIKTOKEN_CACHE_DIR; startup stops waiting after this long.
+ENCODING_LOAD_TIMEOUT_SECONDS = 15
+
+logger = logging.getLogger(__name__)
+
+# Loaded encodings by model; None means the estimate is used.
+_encodings: dict = {}
+
+
+def _load_encoding(model: str):
+    # Imported on first use: loading tiktoken is slow and only token counting needs it.
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as e:
+        logger.warning("Could not load the tokenizer of %s, estimating token counts: %s", model, e)
+        return None
+
+
+def _encoding(model: str):
+    # Failures are cached too, so an unreachable download is only attempted once.
+    if model not in _encodings:
+        _encodings[model] = _load_encoding(model)
+    return _encodings[model]
+
+
+async def load_encodings(models: Iterable[str]):
+    """
+    Loads the tokenizers of the given models in a worker thread, so requests never
+    wait for a vocabulary download on the event loop. Models still loading after
+    ENCODING_LOAD_TIMEOUT_SECONDS use the estimate until their load completes.
+    """
+    models = list(models)
+
+    def load():
+        for model in models:
+            _encodings[model] = _load_encoding(model)
+
+    try:
+        await asyncio.wait_for(asyncio.to_thread(load), ENCODING_LOAD_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Tokenizers are still loading, estimating token counts meanwhile")
+        for model in models:
+            _encodings.setdefault(model, None)
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Counts the tokens of text as the given model would see them.
+    Falls back to a characters-per-token estimate when tiktoken is unavailable or
+    the model's vocabulary could not be loaded.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Returns the longest prefix of text that fits in max_tokens tokens of the given model.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+from sqlalchemy import Date, cast, func, select
+from app.db.dialect import dialect_insert
+from app.db.session import dispose_engine, get_engine
+from app.models.prompt import Prompt
+from app.models.user_usage import UserUsage
+
+
+def _utc_day(dialect_name: str):
+    if dialect_name == "postgresql":
+        return cast(func.timezone("UTC", Prompt.created_at), Date)
+    # SQLite stores CURRENT_TIMESTAMP in UTC already.
+    return func.date(Prompt.created_at)
+
+
+async def backfill_usage(replace: bool = False) -> int:
+    """
+    Builds the daily user_usage buckets from the prompts table with one INSERT ... SELECT.
+    Existing buckets are kept unless replace is True, so running it after the
+    incremental counters went live does not overwrite usage of since-deleted prompts.
+    Returns the number of buckets written.
+    """
+    async with get_engine().begin() as conn:
+        dialect_name = conn.dialect.name
+        day = _utc_day(dialect_name).label("day")
+        aggregates = (
+            select(Prompt.user_id, day, func.count().label("prompts"),
+                   func.coalesce(func.sum(Prompt.total_tokens), 0).label("total_tokens"))
+            .where(Prompt.created_at.is_not(None))
+            .group_by(Prompt.user_id, day)
+        )
+        stmt = dialect_insert(dialect_name, UserUsage).from_select(
+            ["user_id", "day", "prompts", "total_tokens"], aggregates)
+        if replace:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserUsage.user_id, UserUsage.day],
+                set_={"prompts": stmt.excluded.prompts,
+                      "total_tokens": stmt.excluded.total_tokens,
+                      "updated_at": func.now()},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(
+                index_elements=[UserUsage.user_id, UserUsage.day])
+        result = await conn.execute(stmt)
+    await dispose_engine()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backfill user_usage daily buckets from existing prompts.")
+    parser.add_argument("--replace", action="store_true",
+                        help="overwrite existing buckets instead of only filling missing days")
+    args = parser.parse_args()
+    written = asyncio.run(backfill_usage(args.replace))
+    print(f"Backfilled {written} usage buckets.")
@@ -0,0 +1,14 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(dialect_name: str, table):
+    """
+    Returns a dialect-specific INSERT construct for the given table, which supports
+    ON CONFLICT clauses on PostgreSQL and SQLite.
+    Raises ValueError for dialects without upsert support.
+    """
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    raise ValueError(f"Upsert is not supported for dialect '{dialect_name}'")
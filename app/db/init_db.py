@@ -1,12 +1,35 @@
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from app.db.base import Base
-from app.db.session import engine
-from app.models import user, prompt
+from app.db.search import create_search_index
+from app.db.session import dispose_engine, get_engine
+from app.models import user, prompt, optimization_cache, user_usage, prompt_job
 
+# SQLite compares timestamps as text: rows stored by server_default=now() lack the
+# fraction the application writes ('YYYY-MM-DD HH:MM:SS' vs '... HH:MM:SS.ffffff').
+SQLITE_TIMESTAMP_FIXUP = (
+    "UPDATE prompts SET created_at = created_at || '.000000' WHERE length(created_at) = 19"
+)
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+
+def normalize_timestamps(connection: Connection):
+    """
+    Rewrites whole-second SQLite prompt timestamps in the application's format, so
+    keyset pagination on created_at matches every row exactly once. No-op elsewhere.
+    """
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(SQLITE_TIMESTAMP_FIXUP))
+
+
+async def init_db():
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_search_index)
+        await conn.run_sync(normalize_timestamps)
+    await dispose_engine()
 
 
 if __name__ == "__main__":
-    init_db()
+    asyncio.run(init_db())
     print("Database initialized successfully.")
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from limits.storage import storage_from_string
+from app.core import rate_limit_storage  # noqa: F401  registers the sqlite:// storage scheme
+from app.core.config import get_settings
+from app.db.session import SessionLocal, create_engine_for
+
+settings = get_settings()
+
+# Seconds the replica is behind the primary; 0 once it replayed everything it received,
+# so an idle primary does not make its replicas look stale.
+LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+# Backends without replication (e.g. a copied SQLite file) only need to be reachable.
+DEFAULT_LAG_QUERY = "SELECT 0"
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaSet:
+    """
+    Read replicas, picked round-robin among those whose last health check succeeded
+    with a replication lag of at most max_lag seconds.
+    Replicas count as unhealthy until their first check, so reads stay on the primary
+    until then. Engines are created on first use.
+    """
+
+    def __init__(self, urls: tuple[str, ...], max_lag: float, check_seconds: float):
+        self.urls = urls
+        self.max_lag = max_lag
+        self.check_seconds = check_seconds
+        self.lags: list[Optional[float]] = [None] * len(urls)
+        self.reads = [0] * len(urls)
+        self._engines: Optional[list[AsyncEngine]] = None
+        self._sessionmakers: Optional[list[async_sessionmaker]] = None
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        if self._engines is None:
+            self._engines = [create_engine_for(url) for url in self.urls]
+        return self._engines
+
+    @property
+    def sessionmakers(self) -> list[async_sessionmaker]:
+        if self._sessionmakers is None:
+            self._sessionmakers = [async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+                                   for engine in self.engines]
+        return self._sessionmakers
+
+    def healthy(self, index: int) -> bool:
+        lag = self.lags[index]
+        return lag is not None and lag <= self.max_lag
+
+    def next_healthy(self) -> Optional[int]:
+        """
+        Returns the index of the next healthy replica, round-robin, or None if there is none.
+        """
+        for _ in range(len(self.urls)):
+            index = self._next % len(self.urls)
+            self._next += 1
+            if self.healthy(index):
+                return index
+        return None
+
+    async def _measure_lag(self, engine: AsyncEngine) -> float:
+        query = LAG_QUERIES.get(engine.dialect.name, DEFAULT_LAG_QUERY)
+        async with engine.connect() as conn:
+            return float(await conn.scalar(text(query)) or 0)
+
+    async def _check(self, index: int, engine: AsyncEngine):
+        try:
+            lag = await asyncio.wait_for(self._measure_lag(engine), self.check_seconds)
+        except Exception as e:
+            if self.lags[index] is not None:
+                logger.warning("Read replica %s is unavailable: %s", index, e)
+            lag = None
+        if lag is not None and lag > self.max_lag and self.healthy(index):
+            logger.warning("Read replica %s is %.1fs behind the primary", index, lag)
+        self.lags[index] = lag
+
+    async def check(self):
+        """
+        Measures the replication lag of every replica; unreachable replicas get None.
+        """
+        await asyncio.gather(*(self._check(index, engine) for index, engine in enumerate(self.engines)))
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        if self.urls:
+            self._task = asyncio.create_task(self._run(), name="read-replica-health-check")
+
+    async def stop(self):
+        """
+        Stops the health checks and closes the replica connection pools.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for engine in self._engines or []:
+            await engine.dispose()
+
+    def status(self) -> list[dict]:
+        return [
+            {
+                "url": make_url(url).render_as_string(hide_password=True),
+                "healthy": self.healthy(index),
+                "lag_seconds": self.lags[index],
+                "reads": self.reads[index],
+            }
+            for index, url in enumerate(self.urls)
+        ]
+
+
+replicas = ReplicaSet(settings.database_replica_urls, settings.db_replica_max_lag_seconds,
+                      settings.db_replica_check_seconds)
+
+# A healthy replica can be up to max lag plus one check interval behind, so users who
+# just wrote read from the primary for that long to see their own writes.
+PRIMARY_PIN_SECONDS = math.ceil(settings.db_replica_max_lag_seconds + settings.db_replica_check_seconds)
+
+# Pins are kept in the rate limit storage, so a write handled by one worker pins the
+# user's reads in every worker sharing RATE_LIMIT_STORAGE_URI (all workers on the host
+# with the default SQLite file, all hosts with a shared backend such as Redis).
+# The storage is synchronous (a SQLite file by default), so it is only used from a
+# worker thread.
+_primary_pins = storage_from_string(settings.rate_limit_storage_uri) if replicas.urls else None
+
+
+def _pin_keys(user_id: UUID, now: float) -> tuple[str, str]:
+    # Pins are counted in PRIMARY_PIN_SECONDS buckets whose keys live for two buckets:
+    # a write is a single atomic incr, and a pin set at time t is still found in its
+    # own or the previous bucket until at least t + PRIMARY_PIN_SECONDS.
+    bucket = int(now // PRIMARY_PIN_SECONDS)
+    return f"primary-pin/{user_id}/{bucket}", f"primary-pin/{user_id}/{bucket - 1}"
+
+
+def _pin(user_id: UUID):
+    current, _ = _pin_keys(user_id, time.time())
+    _primary_pins.incr(current, 2 * PRIMARY_PIN_SECONDS)
+
+
+def _is_pinned(user_id: UUID) -> bool:
+    return any(_primary_pins.get(key) > 0 for key in _pin_keys(user_id, time.time()))
+
+
+async def pin_to_primary(user_id: UUID):
+    """
+    Sends the user's reads to the primary until replicas have caught up with a write
+    the user just made.
+    """
+    if _primary_pins is None:
+        return
+    try:
+        await asyncio.to_thread(_pin, user_id)
+    except Exception as e:
+        logger.warning("Could not pin reads of user %s to the primary: %s", user_id, e)
+
+
+async def _pinned(user_id: UUID) -> bool:
+    try:
+        return await asyncio.to_thread(_is_pinned, user_id)
+    except Exception as e:
+        logger.warning("Could not read the primary pin of user %s: %s", user_id, e)
+        return True
+
+
+async def _read_sessionmaker(user_id: Optional[UUID]) -> Callable[[], AsyncSession]:
+    if _primary_pins is None:
+        return SessionLocal
+    index = replicas.next_healthy()
+    # The pin is only looked up when a replica would actually serve the read.
+    if index is None or (user_id is not None and await _pinned(user_id)):
+        return SessionLocal
+    replicas.reads[index] += 1
+    return replicas.sessionmakers[index]
+
+
+@asynccontextmanager
+async def ReadSessionLocal(user_id: Optional[UUID] = None) -> AsyncIterator[AsyncSession]:
+    """
+    Opens a session for read-only queries: on a healthy replica, round-robin, unless
+    the user was pinned to the primary by a recent write; on the primary otherwise.
+    """
+    async with (await _read_sessionmaker(user_id))() as session:
+        yield session
+
+
+def get_replica_status() -> list[dict]:
+    """
+    Returns the health, replication lag and number of reads served of every replica.
+    """
+    return replicas.status()
@@ -0,0 +1,62 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Language-agnostic configuration: prompts are written in several languages.
+SEARCH_CONFIG = "simple"
+
+POSTGRES_SEARCH_DDL = [
+    f"""
+    ALTER TABLE prompts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(original_prompt, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(optimized_prompt, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(explanation, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_prompts_search_vector ON prompts USING gin (search_vector)",
+]
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+        prompt_id UNINDEXED, original_prompt, optimized_prompt, explanation,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS prompts_fts_ai AFTER INSERT ON prompts BEGIN
+        INSERT INTO prompts_fts (prompt_id, original_prompt, optimized_prompt, explanation)
+        VALUES (new.id, new.original_prompt, new.optimized_prompt, new.explanation);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS prompts_fts_ad AFTER DELETE ON prompts BEGIN
+        DELETE FROM prompts_fts WHERE prompt_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS prompts_fts_au
+    AFTER UPDATE OF original_prompt, optimized_prompt, explanation ON prompts BEGIN
+        DELETE FROM prompts_fts WHERE prompt_id = old.id;
+        INSERT INTO prompts_fts (prompt_id, original_prompt, optimized_prompt, explanation)
+        VALUES (new.id, new.original_prompt, new.optimized_prompt, new.explanation);
+    END
+    """,
+    """
+    INSERT INTO prompts_fts (prompt_id, original_prompt, optimized_prompt, explanation)
+    SELECT id, original_prompt, optimized_prompt, explanation FROM prompts
+    WHERE NOT EXISTS (SELECT 1 FROM prompts_fts LIMIT 1)
+    """,
+]
+
+
+def create_search_index(connection: Connection):
+    """
+    Creates the full-text search structures for the connection's dialect: a generated
+    tsvector column with a GIN index on PostgreSQL, or an FTS5 table kept in sync by
+    triggers on SQLite. Safe to run repeatedly.
+    """
+    ddl = {"postgresql": POSTGRES_SEARCH_DDL,
+           "sqlite": SQLITE_SEARCH_DDL}.get(connection.dialect.name, [])
+    for statement in ddl:
+        connection.execute(text(statement))
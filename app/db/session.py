@@ -1,11 +1,134 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
+import time
+from functools import lru_cache
+from typing import AsyncIterator
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import get_settings
 
-load_dotenv()
+settings = get_settings()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def to_async_url(url: str) -> URL:
+    """
+    Rewrites a database URL to use the async driver of its backend
+    (e.g. postgresql:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://).
+    """
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver and url.get_driver_name() != driver:
+        url = url.set(drivername=f"{url.get_backend_name()}+{driver}")
+    return url
+
+
+class PoolStats:
+    """
+    Accumulates connection checkout counts and wait times for a pool.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records how long each connection checkout waits.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+def create_engine_for(url: str):
+    """
+    Creates an AsyncEngine for the given database URL with the configured pool settings.
+    In-memory SQLite databases keep SQLAlchemy's default single-connection pool.
+    """
+    async_url = to_async_url(url)
+    if async_url.get_backend_name() == "sqlite" and async_url.database in (None, "", ":memory:"):
+        return create_async_engine(async_url)
+    return create_async_engine(
+        async_url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> AsyncEngine:
+    """
+    Returns the process-wide AsyncEngine for DATABASE_URL, creating it on first use
+    so importing the app does not load the database driver.
+    """
+    return create_engine_for(settings.database_url)
+
+
+@lru_cache(maxsize=1)
+def _sessionmaker() -> async_sessionmaker:
+    return async_sessionmaker(bind=get_engine(), autoflush=False, expire_on_commit=False)
+
+
+def SessionLocal() -> AsyncSession:
+    """
+    Opens a new AsyncSession bound to the process-wide engine.
+    """
+    return _sessionmaker()()
+
+
+async def dispose_engine():
+    """
+    Closes the connection pool of the process-wide engine, if it was created.
+    """
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency that provides an AsyncSession for the duration of a request.
+    A pool connection is only checked out once the session runs its first statement.
+    """
+    async with SessionLocal() as db:
+        yield db
+
+
+def get_pool_status() -> dict:
+    """
+    Returns the occupancy of the connection pool and the checkout wait statistics.
+    """
+    pool = get_engine().sync_engine.pool
+    status = {
+        "checkouts": pool_stats.checkouts,
+        "checkout_wait_seconds_total": pool_stats.wait_seconds_total,
+        "checkout_wait_seconds_avg": pool_stats.wait_seconds_total / pool_stats.checkouts if pool_stats.checkouts else 0.0,
+        "checkout_wait_seconds_max": pool_stats.wait_seconds_max,
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.db_max_overflow,
+        })
+    return status
@@ -1,16 +1,72 @@
-from fastapi import FastAPI, Request, Response
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from app.core.rate_limiter import limiter
+from app.core.llm import close_openai_client, get_llm_status
+from app.core.metrics import (
+    PrometheusMiddleware, instrument_engine, metrics_response, record_rate_limit_rejection,
+    register_pool_collector
+)
+from app.core.passwords import get_password_pool_status, shutdown_password_pool
+from app.core.tokens import load_encodings
+from app.db.replicas import get_replica_status, replicas
+from app.db.session import dispose_engine, get_engine, get_pool_status
+from app.services.cache_service import get_cache_stats
+from app.services.job_service import job_workers
+from app.services.prompt_service import MODEL_TIERS
+from app.services.similarity_service import build_similarity_index, get_similarity_stats
 from app.api import auth
 from app.api import prompt
 
-app = FastAPI(title="PromptLazy API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan.
+    On startup creates and instruments the database engines, loads the tokenizers of
+    the model tiers off the event loop, starts the read replica health checks and the
+    prompt job workers and builds the prompt similarity index in the background; the
+    OpenAI client and bcrypt context are created on first use.
+    On shutdown stops the workers, health checks and index build, releases the shared
+    OpenAI and database connection pools and stops the password worker processes.
+    """
+    instrument_engine(get_engine())
+    for engine in replicas.engines:
+        instrument_engine(engine)
+    await load_encodings(model for model, _ in MODEL_TIERS)
+    replicas.start()
+    job_workers.start()
+    index_build = asyncio.create_task(build_similarity_index())
+    yield
+    index_build.cancel()
+    await asyncio.gather(index_build, return_exceptions=True)
+    await job_workers.stop()
+    await replicas.stop()
+    await close_openai_client()
+    await dispose_engine()
+    shutdown_password_pool()
+
+
+app = FastAPI(title="PromptLazy API", version="1.0.0", lifespan=lifespan)
+
+register_pool_collector(get_pool_status)
+
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    """
+    Counts the rejection by route and limit, then returns slowapi's 429 response.
+    """
+    record_rate_limit_rejection(request, str(exc.limit.limit))
+    return _rate_limit_exceeded_handler(request, exc)
+
 
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
 
 app.add_middleware(
@@ -21,6 +77,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it wraps every other middleware and times the whole request.
+app.add_middleware(PrometheusMiddleware)
+
 app.include_router(auth.router)
 app.include_router(prompt.router)
 
@@ -53,3 +112,59 @@ def api_status(request: Request):
     Returns a message indicating that the API is alive and running.
     """
     return {"status": "alive", "message": "La API está viva y coleando!"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus scrape endpoint.
+    Returns request, rate limit, database and OpenAI metrics in the Prometheus text format.
+    """
+    return metrics_response()
+
+
+@app.get("/status/similarity")
+def similarity_status():
+    """
+    Prompt similarity index status endpoint.
+    Returns whether this worker finished building its near-duplicate index, its size
+    and the number of improvements that reused a near-duplicate's optimization.
+    """
+    return get_similarity_stats()
+
+
+@app.get("/status/cache")
+def cache_status():
+    """
+    Optimization cache status endpoint.
+    Returns the hit/miss counters and tokens saved by the /prompt/improve cache in this worker.
+    """
+    return get_cache_stats()
+
+
+@app.get("/status/db")
+def db_status():
+    """
+    Database pool status endpoint.
+    Returns the connection pool occupancy and checkout wait times of this worker, and
+    the health, replication lag and reads served of every read replica.
+    """
+    return {**get_pool_status(), "replicas": get_replica_status()}
+
+
+@app.get("/status/passwords")
+def passwords_status():
+    """
+    Password hashing pool status endpoint.
+    Returns the number of bcrypt workers and the hashing jobs in flight or queued in this worker.
+    """
+    return get_password_pool_status()
+
+
+@app.get("/status/llm")
+def llm_status():
+    """
+    OpenAI call layer status endpoint.
+    Returns the circuit breaker state and the hedging threshold of this worker.
+    """
+    return get_llm_status()
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class OptimizationCache(Base):
+    __tablename__ = 'optimization_cache'
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    optimized_prompt = Column(Text, nullable=False)
+    explanation = Column(Text, nullable=True)
+    total_tokens = Column(Integer, default=0)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
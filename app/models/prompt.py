@@ -1,6 +1,7 @@
-from sqlalchemy import Column, ForeignKey, Text, DateTime, Integer, Boolean
+from sqlalchemy import Column, ForeignKey, Text, String, DateTime, Integer, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 from app.db.base import Base
 
@@ -15,7 +16,22 @@ class Prompt(Base):
     optimized_prompt = Column(Text, nullable=True)
     explanation = Column(Text, nullable=True)
     total_tokens = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    model = Column(String, nullable=True)
+    # Set by the application so SQLite stores microseconds, in the same text format as
+    # the bound keyset cursor; server_default=now() only stores whole seconds there.
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(),
                         onupdate=func.now())
     is_favorite = Column(Boolean, default=False)
+    # Full-text search data (search_vector on PostgreSQL, prompts_fts on SQLite) is
+    # maintained by the database itself; see app/db/search.py.
+
+    __table_args__ = (
+        Index('ix_prompts_user_id_created_at_id',
+              user_id, created_at.desc(), id),
+        Index('ix_prompts_user_id_favorite_created_at_id',
+              user_id, created_at.desc(), id,
+              postgresql_where=is_favorite.is_(True),
+              sqlite_where=is_favorite.is_(True)),
+    )
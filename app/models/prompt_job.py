@@ -0,0 +1,35 @@
+from sqlalchemy import Column, ForeignKey, Text, String, DateTime, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+from app.db.base import Base
+
+
+class PromptJob(Base):
+    """
+    A queued /prompt/improve request processed by the in-process job workers.
+    Status moves queued -> running -> succeeded | failed. A running job whose lease
+    expired (its worker died) is claimable again until max attempts are used up.
+    """
+    __tablename__ = 'prompt_jobs'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey(
+        'users.id'), nullable=False)
+    prompt_text = Column(Text, nullable=False)
+    status = Column(String(16), nullable=False, default="queued")
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    prompt_id = Column(UUID(as_uuid=True), ForeignKey(
+        'prompts.id', ondelete='SET NULL'), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_prompt_jobs_status_priority_created_at',
+              status, priority.desc(), created_at),
+        Index('ix_prompt_jobs_user_id_status', user_id, status),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, ForeignKey, Date, DateTime, Integer, BigInteger
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class UserUsage(Base):
+    """
+    Daily (UTC) aggregate of a user's optimizations and tokens. Rows are incremented
+    in the same transaction as the prompt write, and survive prompt deletion.
+    """
+    __tablename__ = 'user_usage'
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey(
+        'users.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    prompts = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now())
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from uuid import UUID
 
 
 class Token(BaseModel):
@@ -44,3 +45,15 @@ class UserUpdateRequest(BaseModel):
                 "new_password": "new_secure_password_123"
             }
         }
+
+
+class CurrentUser(BaseModel):
+    id: UUID
+    email: str
+    username: str
+    full_name: Optional[str] = None
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+        frozen = True
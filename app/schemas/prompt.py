@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Literal
 from uuid import UUID
 from datetime import datetime
 
@@ -11,12 +11,67 @@ class PromptRequest(BaseModel):
 class PromptResponse(BaseModel):
     id: UUID
     original_prompt: str
-    optimized_prompt: str
+    # None for imported prompts that were never optimized.
+    optimized_prompt: Optional[str] = None
     explanation: Optional[str] = None
     total_tokens: int
+    model: Optional[str] = None
     created_at: datetime
     is_favorite: bool
+    # Set when the optimization was reused from a near-duplicate earlier prompt.
+    similarity: Optional[float] = None
 
 
 class PromptListResponse(BaseModel):
     prompts: List[PromptResponse]
+    next_cursor: Optional[str] = None
+
+
+class PromptBatchRequest(BaseModel):
+    prompts: List[str]
+
+
+class PromptBatchItem(BaseModel):
+    index: int
+    prompt: Optional[PromptResponse] = None
+    error: Optional[str] = None
+
+
+class PromptBatchResponse(BaseModel):
+    results: List[PromptBatchItem]
+
+
+class PromptBulkRequest(BaseModel):
+    ids: List[UUID]
+    action: Literal["favorite", "unfavorite", "delete"]
+
+
+class PromptBulkResponse(BaseModel):
+    action: str
+    ids: List[UUID]
+
+
+class PromptImportResponse(BaseModel):
+    imported: int
+
+
+class PromptJobResponse(BaseModel):
+    id: UUID
+    status: str
+    priority: int
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    prompt: Optional[PromptResponse] = None
+
+
+class PromptSearchResult(PromptResponse):
+    rank: float
+    highlights: Dict[str, Optional[str]]
+
+
+class PromptSearchResponse(BaseModel):
+    results: List[PromptSearchResult]
+    next_offset: Optional[int] = None
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import date
+
+
+class UsageDay(BaseModel):
+    day: date
+    prompts: int
+    total_tokens: int
+
+
+class UsageResponse(BaseModel):
+    start: date
+    end: date
+    prompts: int
+    total_tokens: int
+    days: List[UsageDay]
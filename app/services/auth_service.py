@@ -1,87 +1,96 @@
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
+from app.core.cache import TTLCache
+from app.schemas.auth import CurrentUser
 from app.core.security import create_access_token, create_refresh_token
-from passlib.context import CryptContext
+from app.core.passwords import hash_password, verify_password, verify_and_update_password
 from fastapi import HTTPException, status
 from uuid import UUID
 from sqlalchemy.exc import IntegrityError
+from app.core.config import get_settings
+from app.db.replicas import pin_to_primary
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+settings = get_settings()
 
-
-def hash_password(password: str) -> str:
-    """
-    Hashes a plain password using bcrypt.
-    Returns the hashed password as a string.
-    """
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Verifies a plain password against a hashed password.
-    Returns True if the password matches, False otherwise.
-    """
-    return pwd_context.verify(plain_password, hashed_password)
+_user_cache = TTLCache(maxsize=settings.user_cache_size,
+                       ttl=settings.user_cache_ttl_seconds)
 
 
-def register_user(db: Session, email: str, password: str, username: str = None, full_name: str = None):
+async def register_user(db: AsyncSession, email: str, password: str, username: str = None, full_name: str = None):
     """
     Registers a new user with the given email, password, username, and full name.
     Hashes the password before storing it.
     Raises HTTPException if the email is already registered.
     Returns the created User object.
     """
-    hashed = hash_password(password)
+    hashed = await hash_password(password)
     user = User(email=email, hashed_password=hashed,
                 username=username, full_name=full_name, is_active=True)
     db.add(user)
     try:
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
+    await pin_to_primary(user.id)
     return user
 
 
-def authenticate_user(db: Session, email: str, password: str):
+async def authenticate_user(db: AsyncSession, email: str, password: str):
     """
     Authenticates a user by email and password.
     Returns the User object if authentication is successful, otherwise None.
+    Deactivated users cannot authenticate.
+    If the stored hash uses an outdated cost factor it is replaced transparently.
     """
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user or not user.is_active:
         return None
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 
-def update_user(db: Session, user: User, update_data: dict):
+async def update_user(db: AsyncSession, current_user: CurrentUser, update_data: dict) -> User:
     """
     Updates user information based on the provided data.
     If updating password, verifies the current password first.
+    Evicts the user from the authenticated-user cache and pins their reads to the
+    primary once the change is committed.
     Returns the updated user object.
     Raises HTTPException if:
+    - The user no longer exists
     - Current password is required but not provided when updating password
     - Current password is incorrect
     - New email is already registered
     - New username is already taken
     """
+    user = await db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
     if 'new_password' in update_data:
         if not update_data.get('current_password'):
             raise HTTPException(
                 status_code=400,
                 detail="Current password is required to change password"
             )
-        if not verify_password(update_data['current_password'], user.hashed_password):
+        if not await verify_password(update_data['current_password'], user.hashed_password):
             raise HTTPException(
                 status_code=400,
                 detail="Incorrect current password"
             )
-        user.hashed_password = hash_password(update_data['new_password'])
+        user.hashed_password = await hash_password(update_data['new_password'])
         update_data.pop('new_password')
         update_data.pop('current_password')
 
@@ -90,10 +99,10 @@ def update_user(db: Session, user: User, update_data: dict):
             setattr(user, field, value)
 
     try:
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         if 'email' in str(e).lower():
             raise HTTPException(
                 status_code=400,
@@ -106,9 +115,59 @@ def update_user(db: Session, user: User, update_data: dict):
             )
         raise HTTPException(status_code=400, detail="Update failed")
 
+    invalidate_cached_user(user.id)
+    await pin_to_primary(user.id)
     return user
 
 
+async def deactivate_user(db: AsyncSession, current_user: CurrentUser):
+    """
+    Deactivates the given user so their tokens and credentials are no longer accepted.
+    Evicts the user from the authenticated-user cache and pins their reads to the
+    primary once the change is committed.
+    """
+    user = await db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    user.is_active = False
+    await db.commit()
+    invalidate_cached_user(user.id)
+    await pin_to_primary(user.id)
+
+
+async def get_active_user(db: AsyncSession, user_id: UUID) -> Optional[CurrentUser]:
+    """
+    Resolves an active user by ID, serving repeated lookups from a bounded TTL cache
+    so authenticated requests skip the database (and the pool checkout) on a hit.
+    Returns None if the user does not exist or is inactive.
+    Entries are evicted explicitly on updates and deactivation in this worker; other
+    workers see the change once USER_CACHE_TTL_SECONDS elapses.
+    """
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = await db.get(User, user_id)
+    if not user or not user.is_active:
+        return None
+    current_user = CurrentUser.model_validate(user)
+    _user_cache.set(user_id, current_user)
+    return current_user
+
+
+def get_cached_user(user_id: UUID) -> Optional[CurrentUser]:
+    """
+    Returns the active user from this worker's user cache, or None on a miss.
+    """
+    return _user_cache.get(user_id)
+
+
+def invalidate_cached_user(user_id: UUID):
+    """
+    Removes a user from the authenticated-user cache.
+    """
+    _user_cache.pop(user_id)
+
+
 def create_token_pair(user_id: UUID):
     """
     Creates a pair of access and refresh tokens for the given user ID.
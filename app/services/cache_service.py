@@ -0,0 +1,115 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.db.dialect import dialect_insert
+from app.models.optimization_cache import OptimizationCache
+
+settings = get_settings()
+
+
+class CachedOptimization(NamedTuple):
+    optimized_prompt: str
+    explanation: Optional[str]
+    total_tokens: int
+
+
+_memory_cache = TTLCache(maxsize=settings.optimization_cache_size,
+                         ttl=settings.optimization_cache_ttl_seconds)
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "tokens_saved": 0}
+
+
+def normalize_prompt(prompt_text: str) -> str:
+    """
+    Normalizes a prompt for cache lookups by collapsing whitespace and case.
+    """
+    return " ".join(prompt_text.split()).casefold()
+
+
+def make_cache_key(prompt_text: str, model: str, system_prompt: str) -> str:
+    """
+    Builds the cache key for an optimization as a SHA-256 hex digest of the
+    normalized prompt, the model and the system prompt.
+    """
+    digest = hashlib.sha256()
+    for part in (normalize_prompt(prompt_text), model, system_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def get_cached_optimization(db: AsyncSession, key: str) -> Optional[CachedOptimization]:
+    """
+    Looks up an optimization in the in-process tier first and then in the shared
+    database tier, promoting database hits into memory.
+    Returns None on a miss.
+    """
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        _stats["memory_hits"] += 1
+        _stats["tokens_saved"] += cached.total_tokens
+        return cached
+
+    cutoff = datetime.now(timezone.utc) - \
+        timedelta(seconds=settings.optimization_cache_db_ttl_seconds)
+    row = await db.scalar(select(OptimizationCache).where(
+        OptimizationCache.key == key,
+        OptimizationCache.created_at >= cutoff
+    ))
+    if not row:
+        _stats["misses"] += 1
+        return None
+
+    row.hits = (row.hits or 0) + 1
+    cached = CachedOptimization(
+        row.optimized_prompt, row.explanation, row.total_tokens or 0)
+    _memory_cache.set(key, cached)
+    _stats["db_hits"] += 1
+    _stats["tokens_saved"] += cached.total_tokens
+    return cached
+
+
+async def store_optimization(db: AsyncSession, key: str, model: str, optimized: str,
+                             explanation: Optional[str], total_tokens: int):
+    """
+    Stores a fresh optimization in both cache tiers.
+    The database write joins the caller's transaction and replaces any expired
+    entry stored under the same key.
+    """
+    cached = CachedOptimization(optimized, explanation, total_tokens)
+    _memory_cache.set(key, cached)
+    stmt = dialect_insert(db.get_bind().dialect.name, OptimizationCache).values(
+        key=key,
+        model=model,
+        optimized_prompt=optimized,
+        explanation=explanation,
+        total_tokens=total_tokens,
+        hits=0,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OptimizationCache.key],
+        set_={
+            "optimized_prompt": stmt.excluded.optimized_prompt,
+            "explanation": stmt.excluded.explanation,
+            "total_tokens": stmt.excluded.total_tokens,
+            "created_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+def get_cache_stats() -> dict:
+    """
+    Returns the hit/miss counters of this process and the tokens saved by cache hits.
+    """
+    hits = _stats["memory_hits"] + _stats["db_hits"]
+    lookups = hits + _stats["misses"]
+    return {
+        **_stats,
+        "hit_ratio": hits / lookups if lookups else 0.0,
+        "memory_entries": len(_memory_cache),
+    }
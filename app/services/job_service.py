@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.prompt import Prompt
+from app.models.prompt_job import PromptJob
+from app.schemas.auth import CurrentUser
+from app.services.auth_service import get_active_user
+from app.services.prompt_service import improve_prompt
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue_prompt_job(db: AsyncSession, user: CurrentUser, prompt_text: str, priority: int = 0) -> PromptJob:
+    """
+    Stores a queued prompt improvement job and wakes the local workers.
+    Returns the committed PromptJob.
+    """
+    job = PromptJob(user_id=user.id, prompt_text=prompt_text,
+                    status="queued", priority=priority, attempts=0)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    job_workers.notify()
+    return job
+
+
+async def get_prompt_job(db: AsyncSession, user: CurrentUser, job_id: UUID) -> tuple[PromptJob, Optional[Prompt]]:
+    """
+    Retrieves a job of the given user together with the prompt it produced, if any.
+    Raises HTTPException 404 if the job does not exist.
+    """
+    job = await db.scalar(select(PromptJob).where(PromptJob.id == job_id, PromptJob.user_id == user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    prompt = await db.get(Prompt, job.prompt_id) if job.prompt_id else None
+    return job, prompt
+
+
+def _claimable(now: datetime):
+    return or_(PromptJob.status == "queued",
+               and_(PromptJob.status == "running", PromptJob.lease_expires_at <= now))
+
+
+async def claim_next_job(db: AsyncSession) -> Optional[PromptJob]:
+    """
+    Atomically leases the next job to run, or returns None if nothing is claimable.
+    Jobs of users with fewer running jobs go first, so one user's backlog cannot
+    starve everyone else; users already at PROMPT_JOB_MAX_PER_USER running jobs are
+    skipped. Within that, higher priority and then older jobs win.
+    On PostgreSQL the candidate row is locked with SKIP LOCKED, so concurrent
+    workers in other processes claim different jobs without waiting on each other.
+    """
+    now = _utcnow()
+    running = aliased(PromptJob)
+    user_running = (
+        select(func.count())
+        .where(running.user_id == PromptJob.user_id,
+               running.status == "running",
+               running.lease_expires_at > now)
+        .correlate(PromptJob)
+        .scalar_subquery()
+    )
+    candidate = (
+        select(PromptJob.id)
+        .where(_claimable(now), user_running < settings.prompt_job_max_per_user)
+        .order_by(user_running, PromptJob.priority.desc(), PromptJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True, of=PromptJob)
+        .correlate(None)
+        .scalar_subquery()
+    )
+    job = await db.scalar(
+        update(PromptJob)
+        .where(PromptJob.id == candidate, _claimable(now))
+        .values(status="running",
+                attempts=PromptJob.attempts + 1,
+                lease_expires_at=now + timedelta(seconds=settings.prompt_job_lease_seconds),
+                started_at=now)
+        .returning(PromptJob)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return job
+
+
+async def _finish(job_id: UUID, **values):
+    async with SessionLocal() as db:
+        await db.execute(update(PromptJob).where(PromptJob.id == job_id)
+                         .values(lease_expires_at=None, **values))
+        await db.commit()
+
+
+async def run_job(job: PromptJob):
+    """
+    Runs a claimed job through improve_prompt and records the outcome.
+    Failed jobs are queued again until PROMPT_JOB_MAX_ATTEMPTS is reached.
+    """
+    try:
+        async with SessionLocal() as db:
+            user = await get_active_user(db, job.user_id)
+            if user is None:
+                await _finish(job.id, status="failed", error="User is inactive",
+                              finished_at=_utcnow())
+                return
+            prompt = await improve_prompt(user, job.prompt_text, db)
+    except Exception as e:
+        logger.warning("Prompt job %s failed on attempt %s: %s", job.id, job.attempts, e)
+        # Client errors (e.g. an oversized prompt) fail the same way on every attempt.
+        permanent = isinstance(e, HTTPException) and e.status_code < 500
+        if permanent or job.attempts >= settings.prompt_job_max_attempts:
+            await _finish(job.id, status="failed", error=str(e), finished_at=_utcnow())
+        else:
+            await _finish(job.id, status="queued", error=str(e))
+        return
+    await _finish(job.id, status="succeeded", prompt_id=prompt.id, error=None,
+                  finished_at=_utcnow())
+
+
+class JobWorkerPool:
+    """
+    Fixed set of asyncio tasks draining the prompt job table.
+    Idle workers sleep until a job is enqueued in this process or PROMPT_JOB_POLL_SECONDS
+    elapse, which picks up jobs enqueued by other processes and expired leases.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work(), name=f"prompt-job-worker-{index}")
+                       for index in range(self.size)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                async with SessionLocal() as db:
+                    job = await claim_next_job(db)
+            except Exception:
+                logger.exception("Could not claim a prompt job")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.prompt_job_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await run_job(job)
+
+
+job_workers = JobWorkerPool(settings.prompt_job_workers)
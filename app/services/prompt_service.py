@@ -1,39 +1,89 @@
-from app.core.security import openai
+import asyncio
+import math
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Optional, Union
+from app.core.config import get_settings
+from app.core.llm import LLMError, create_chat_completion, iterate_stream
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.serialization import iter_csv, iter_lines, iter_ndjson, to_csv, to_ndjson
+from app.core.singleflight import SingleFlight
+from app.core.tokens import count_tokens, truncate_to_tokens
+from app.db.search import SEARCH_CONFIG
+from app.db.replicas import ReadSessionLocal, pin_to_primary
+from app.db.session import SessionLocal
+from app.services.usage_service import record_usage
+from app.services.similarity_service import find_similar_prompt, forget_prompt, index_prompt
+from app.services.cache_service import (
+    CachedOptimization, make_cache_key, get_cached_optimization, store_optimization
+)
 from app.models.prompt import Prompt
-from sqlalchemy.orm import Session
 from app.models.user import User
-from openai import OpenAIError
+from sqlalchemy import Float, and_, column, delete, func, insert, literal_column, or_, select, table, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.auth import CurrentUser
 from uuid import UUID
 from fastapi import HTTPException
 
+settings = get_settings()
+
+PROMPT_PAGE_SIZE = 50
+PROMPT_MAX_PAGE_SIZE = 200
+SEARCH_HIGHLIGHT_START = "<mark>"
+SEARCH_HIGHLIGHT_STOP = "</mark>"
+SEARCHABLE_FIELDS = ("original_prompt", "optimized_prompt", "explanation")
+PROMPT_PREVIEW_LENGTH = 100
+PROMPT_PROJECTION_FIELDS = ("id", "original_prompt", "optimized_prompt", "explanation",
+                            "total_tokens", "model", "created_at", "is_favorite", "preview")
+PROMPT_SUMMARY_FIELDS = ["id", "preview", "created_at", "is_favorite"]
+PROMPT_EXPORT_FIELDS = ("id", "original_prompt", "optimized_prompt", "explanation",
+                        "total_tokens", "model", "created_at", "is_favorite")
+PROMPT_TRANSFER_CHUNK_SIZE = 1000
+PROMPT_BULK_MAX_SIZE = 1000
+PROMPT_IMPORT_MAX_RECORD_LENGTH = 1_000_000
+
 system_prompt = """
 Eres un experto en prompt engineering. Tu tarea es mejorar el siguiente prompt para que sea más claro, detallado y efectivo. Añade más contexto y detalle al prompt si lo ves necesario y devuelvelo en la siguiente estructura: **Entrada inicial:** [aquí va el prompt original]. **Entrada mejorada:** [aquí va el prompt optimizado]. **Explicación de los cambios:** [aquí va un resumen de los cambios realizados]. La idea es optimizar el prompt para que sea más útil y preciso para el modelo de IA.
 """
 
+_inflight = SingleFlight()
+
+
+def _parse_model_tiers(spec: str) -> list[tuple[str, int]]:
+    tiers = []
+    for entry in spec.split(","):
+        model, _, max_tokens = entry.strip().rpartition(":")
+        tiers.append((model, int(max_tokens)))
+    return sorted(tiers, key=lambda tier: tier[1])
+
 
-def improve_prompt(user: User, prompt_text: str, db: Session) -> Prompt:
+MODEL_TIERS = _parse_model_tiers(settings.prompt_model_tiers)
+
+
+def route_prompt(prompt_text: str) -> tuple[str, str]:
     """
-    Improves a given prompt using OpenAI's GPT-4 model.
-    Returns a Prompt object with the optimized prompt and an explanation of the changes.
-    Raises an exception if the OpenAI API fails.
+    Counts the prompt's tokens locally and picks the smallest model tier it fits in.
+    Prompts larger than the last tier are truncated to fit it when
+    PROMPT_OVERSIZE_POLICY is 'truncate'.
+    Returns the model and the prompt text to send.
+    Raises HTTPException 413 for oversized prompts otherwise.
     """
-    try:
-        response = openai.chat.completions.create(
-            model='gpt-4',
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt_text}
-            ]
-        )
-    except OpenAIError as e:
-        raise Exception(f"OpenAI API error: {str(e)}")
+    for model, max_tokens in MODEL_TIERS:
+        tokens = count_tokens(prompt_text, model)
+        if tokens <= max_tokens:
+            return model, prompt_text
+    if settings.prompt_oversize_policy == "truncate":
+        return model, truncate_to_tokens(prompt_text, max_tokens, model)
+    raise HTTPException(
+        status_code=413, detail=f"Prompt is too long: {tokens} tokens (maximum {max_tokens})")
 
-    content = response.choices[0].message.content
-    total_tokens = response.usage.total_tokens
 
+def _parse_completion(content: str) -> tuple[str, Optional[str]]:
+    """
+    Splits the model output into the optimized prompt and the explanation of the changes.
+    Returns the whole content as the optimized prompt if no explanation marker is found.
+    """
     optimized = content.strip()
     explanation = None
-
     if "\n\nExplicación:" in content:
         try:
             optimized, explanation = content.split("\n\nExplicación:", 1)
@@ -41,98 +91,690 @@ def improve_prompt(user: User, prompt_text: str, db: Session) -> Prompt:
             explanation = explanation.strip()
         except ValueError:
             pass
+    return optimized.strip(), explanation.strip() if explanation else None
+
+
+async def _bump_prompt_version(db: AsyncSession, user_id: UUID):
+    """
+    Increments the user's prompt version within the caller's transaction.
+    Every write to a user's prompts must call this so conditional GETs see the change;
+    it also pins the user's reads to the primary until replicas have the write.
+    Leaves updated_at alone, which tracks profile changes rather than prompt writes.
+    """
+    await pin_to_primary(user_id)
+    await db.execute(update(User).where(User.id == user_id)
+                     .values(prompts_version=User.prompts_version + 1,
+                             updated_at=User.updated_at))
+
+
+async def get_prompt_version(db: AsyncSession, user: CurrentUser) -> int:
+    """
+    Returns the user's current prompt version, a counter bumped on every prompt write.
+    """
+    return await db.scalar(select(User.prompts_version).where(User.id == user.id)) or 0
+
+
+def _upstream_error(e: LLMError) -> HTTPException:
+    """
+    Translates an LLM layer failure into the HTTP error returned to the client:
+    502 for upstream errors, 504 for timeouts and 503 with Retry-After while the
+    circuit breaker is open.
+    """
+    headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+    return HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+
+async def _optimize_text(prompt_text: str, model: str) -> tuple[str, Optional[str], int]:
+    """
+    Sends the prompt to OpenAI through the shared async client, with the timeouts,
+    retries and circuit breaker of app.core.llm.
+    Returns the optimized prompt, the explanation and the total tokens used.
+    Raises HTTPException 502/503/504 if the OpenAI API fails.
+    """
+    try:
+        response = await create_chat_completion(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt_text}
+            ]
+        )
+    except LLMError as e:
+        raise _upstream_error(e) from e
+
+    optimized, explanation = _parse_completion(
+        response.choices[0].message.content)
+    return optimized, explanation, response.usage.total_tokens
+
+
+async def improve_prompt(user: CurrentUser, prompt_text: str, db: AsyncSession) -> Prompt:
+    """
+    Improves a given prompt using the OpenAI model tier chosen by route_prompt.
+    Identical (normalized) prompts are served from the optimization cache, and
+    near-duplicates of the user's earlier prompts reuse their optimization (with
+    the similarity set on the returned prompt); both record zero tokens, since no
+    upstream call is made. Concurrent identical requests share a single upstream
+    call; only the request that made it is charged the tokens.
+    Returns a Prompt object with the optimized prompt and an explanation of the changes.
+    Raises HTTPException 413 for oversized prompts and 502/503/504 if the OpenAI API fails.
+    """
+    model, prompt_text = route_prompt(prompt_text)
+    key = make_cache_key(prompt_text, model, system_prompt)
+    cached = await get_cached_optimization(db, key)
+    similarity = None
+    if not cached:
+        similar = await find_similar_prompt(db, user, prompt_text)
+        if similar:
+            match, similarity = similar
+            cached = CachedOptimization(match.optimized_prompt, match.explanation, 0)
+            model = match.model or model
+    if cached:
+        optimized, explanation, total_tokens = cached.optimized_prompt, cached.explanation, 0
+    else:
+        # Return the pooled connection while waiting on OpenAI.
+        await db.commit()
+        (optimized, explanation, total_tokens), leader = await _inflight.do(
+            key, lambda: _optimize_text(prompt_text, model))
+        if leader:
+            await store_optimization(db, key, model, optimized,
+                                     explanation, total_tokens)
+        else:
+            total_tokens = 0
 
     prompt = Prompt(
         user_id=user.id,
         original_prompt=prompt_text,
-        optimized_prompt=optimized.strip(),
-        explanation=explanation.strip() if explanation else None,
+        optimized_prompt=optimized,
+        explanation=explanation,
         total_tokens=total_tokens,
+        model=model,
     )
     db.add(prompt)
-    db.commit()
-    db.refresh(prompt)
+    await _bump_prompt_version(db, user.id)
+    await record_usage(db, user.id, total_tokens)
+    await db.commit()
+    await db.refresh(prompt)
+    index_prompt(user.id, prompt.id, prompt_text)
+    prompt.similarity = similarity
     return prompt
 
 
-def list_prompts(db: Session, user: User) -> list[Prompt]:
+async def improve_prompts_batch(user: CurrentUser, prompt_texts: list[str], db: AsyncSession) -> list[tuple[Optional[Prompt], Optional[str]]]:
     """
-    Returns a list of all prompts created by the user, ordered by creation date (descending).
+    Improves a list of prompts, sending at most IMPROVE_BATCH_CONCURRENCY requests to
+    OpenAI at a time. Each prompt is routed to its own model tier. Cached prompts and
+    duplicates within the batch cost no extra call.
+    All resulting Prompt rows are written with a single bulk INSERT.
+    Returns a (prompt, error) pair per input, in input order.
     """
-    return db.query(Prompt).filter(Prompt.user_id == user.id).order_by(Prompt.created_at.desc()).all()
+    errors: dict[int, str] = {}
+    requests: dict[int, tuple[str, str, str]] = {}
+    for index, text in enumerate(prompt_texts):
+        if not text.strip():
+            errors[index] = "Prompt cannot be empty"
+            continue
+        try:
+            model, routed_text = route_prompt(text)
+        except HTTPException as e:
+            errors[index] = e.detail
+            continue
+        requests[index] = (make_cache_key(routed_text, model, system_prompt), model, routed_text)
+
+    outcomes: dict[str, Union[tuple[str, Optional[str], int], Exception]] = {}
+    for key, _, _ in requests.values():
+        if key not in outcomes:
+            cached = await get_cached_optimization(db, key)
+            if cached:
+                outcomes[key] = (cached.optimized_prompt,
+                                 cached.explanation, 0)
+
+    # Return the pooled connection while waiting on OpenAI.
+    await db.commit()
+    semaphore = asyncio.Semaphore(settings.improve_batch_concurrency)
+
+    async def optimize(key: str, model: str, text: str):
+        async with semaphore:
+            (optimized, explanation, total_tokens), leader = await _inflight.do(
+                key, lambda: _optimize_text(text, model))
+        return optimized, explanation, total_tokens if leader else 0, leader
 
+    pending = {key: (model, text) for key, model, text in requests.values()
+               if key not in outcomes}
+    fresh = await asyncio.gather(*(optimize(key, model, text) for key, (model, text) in pending.items()),
+                                 return_exceptions=True)
+    for (key, (model, _)), outcome in zip(pending.items(), fresh):
+        if isinstance(outcome, BaseException):
+            outcomes[key] = outcome
+            continue
+        optimized, explanation, total_tokens, leader = outcome
+        outcomes[key] = (optimized, explanation, total_tokens)
+        if leader:
+            await store_optimization(db, key, model, optimized,
+                                     explanation, total_tokens)
 
-def get_prompt_by_id(db: Session, user: User, prompt_id: UUID) -> Prompt:
+    charged = set()
+    rows = []
+    for index in range(len(prompt_texts)):
+        if index in errors:
+            continue
+        key, model, text = requests[index]
+        outcome = outcomes[key]
+        if isinstance(outcome, BaseException):
+            errors[index] = getattr(outcome, "detail", None) or str(outcome)
+            continue
+        optimized, explanation, total_tokens = outcome
+        rows.append({
+            "user_id": user.id,
+            "original_prompt": text,
+            "optimized_prompt": optimized,
+            "explanation": explanation,
+            "total_tokens": 0 if key in charged else total_tokens,
+            "model": model,
+        })
+        charged.add(key)
+
+    created = (await db.scalars(
+        insert(Prompt).returning(Prompt, sort_by_parameter_order=True), rows
+    )).all() if rows else []
+    if rows:
+        await _bump_prompt_version(db, user.id)
+        await record_usage(db, user.id, sum(row["total_tokens"] for row in rows), len(rows))
+    await db.commit()
+    for prompt in created:
+        index_prompt(user.id, prompt.id, prompt.original_prompt)
+    prompts = iter(created)
+    return [(None, errors[index]) if index in errors else (next(prompts), None)
+            for index in range(len(prompt_texts))]
+
+
+async def _stream_optimization(
+    prompt_text: str,
+    model: str,
+    persist: Callable[[str, Optional[str], int], Awaitable[Prompt]]
+) -> AsyncIterator[tuple[str, Union[str, Prompt]]]:
+    """
+    Opens the upstream stream for the optimization of a prompt before any response is
+    sent, so failures to start it reach the client as regular HTTP errors.
+    Returns an async iterator yielding ("token", text) for every content delta and,
+    once the stream completes, ("done", prompt) with the Prompt returned by persist
+    for the parsed result. Closing the iterator early closes the upstream response.
+    Raises HTTPException 502/503/504 (see _upstream_error) if the stream cannot be opened.
+    """
+    try:
+        stream = await create_chat_completion(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt_text}
+            ],
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+    except LLMError as e:
+        raise _upstream_error(e) from e
+
+    async def events() -> AsyncIterator[tuple[str, Union[str, Prompt]]]:
+        parts = []
+        total_tokens = 0
+        try:
+            async for chunk in iterate_stream(stream, model):
+                if chunk.usage:
+                    total_tokens = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield "token", chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+        optimized, explanation = _parse_completion("".join(parts))
+        yield "done", await persist(optimized, explanation, total_tokens)
+
+    return events()
+
+
+async def _replay_cached(
+    cached: CachedOptimization,
+    persist: Callable[[str, Optional[str], int], Awaitable[Prompt]]
+) -> AsyncIterator[tuple[str, Union[str, Prompt]]]:
+    """
+    Emits a cached optimization as a single token event followed by the persisted Prompt.
+    """
+    yield "token", cached.optimized_prompt
+    yield "done", await persist(cached.optimized_prompt, cached.explanation, 0)
+
+
+async def stream_improve_prompt(user: CurrentUser, prompt_text: str, db: AsyncSession) -> AsyncIterator[tuple[str, Union[str, Prompt]]]:
+    """
+    Streaming variant of improve_prompt.
+    Returns an async iterator of ("token", text) events followed by ("done", prompt).
+    The Prompt row is stored in its own session once the stream completes, since the
+    request session may already be closed while the response is being streamed.
+    Raises HTTPException 413 for oversized prompts and 502/503/504 if the upstream
+    stream cannot be opened, before any event is produced.
+    """
+    model, prompt_text = route_prompt(prompt_text)
+    key = make_cache_key(prompt_text, model, system_prompt)
+    cached = await get_cached_optimization(db, key)
+    await db.commit()
+
+    async def persist(optimized: str, explanation: Optional[str], total_tokens: int) -> Prompt:
+        async with SessionLocal() as session:
+            if not cached:
+                await store_optimization(session, key, model, optimized,
+                                         explanation, total_tokens)
+            prompt = Prompt(
+                user_id=user.id,
+                original_prompt=prompt_text,
+                optimized_prompt=optimized,
+                explanation=explanation,
+                total_tokens=total_tokens,
+                model=model,
+            )
+            session.add(prompt)
+            await _bump_prompt_version(session, user.id)
+            await record_usage(session, user.id, total_tokens)
+            await session.commit()
+            await session.refresh(prompt)
+            index_prompt(user.id, prompt.id, prompt_text)
+            return prompt
+
+    if cached:
+        return _replay_cached(cached, persist)
+    return await _stream_optimization(prompt_text, model, persist)
+
+
+async def stream_regenerate_prompt(db: AsyncSession, user: CurrentUser, prompt_id: UUID, new_text: str) -> AsyncIterator[tuple[str, Union[str, Prompt]]]:
+    """
+    Streaming variant of regenerate_prompt.
+    Raises HTTPException 404 immediately if the prompt does not exist, 413 if the
+    new text is oversized and 502/503/504 if the upstream stream cannot be opened;
+    otherwise returns an async iterator of ("token", text) events followed by
+    ("done", prompt).
+    """
+    model, new_text = route_prompt(new_text)
+    await get_prompt_by_id(db, user, prompt_id)
+    await db.commit()
+
+    async def persist(optimized: str, explanation: Optional[str], total_tokens: int) -> Prompt:
+        async with SessionLocal() as session:
+            prompt = await get_prompt_by_id(session, user, prompt_id)
+            previous_text = prompt.original_prompt
+            prompt.original_prompt = new_text
+            prompt.optimized_prompt = optimized
+            prompt.explanation = explanation
+            prompt.total_tokens = total_tokens
+            prompt.model = model
+            await _bump_prompt_version(session, user.id)
+            await record_usage(session, user.id, total_tokens)
+            await session.commit()
+            await session.refresh(prompt)
+            forget_prompt(user.id, prompt.id, previous_text)
+            index_prompt(user.id, prompt.id, new_text)
+            return prompt
+
+    return await _stream_optimization(new_text, model, persist)
+
+
+async def _paginate(db: AsyncSession, query, limit: int, after: Optional[str], entities: bool = True) -> tuple[list, Optional[str]]:
+    """
+    Applies keyset pagination on (created_at DESC, id) to a prompt query.
+    The query selects either Prompt entities or plain columns (which must include
+    'id' and 'created_at'), in which case rows are returned instead of entities.
+    Returns at most limit prompts and the cursor of the next page, or None on the last page.
+    Raises HTTPException 400 if the cursor is invalid.
+    """
+    if after:
+        try:
+            created_at, prompt_id = decode_cursor(after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(or_(
+            Prompt.created_at < created_at,
+            and_(Prompt.created_at == created_at, Prompt.id > prompt_id)
+        ))
+    result = await db.execute(
+        query.order_by(Prompt.created_at.desc(), Prompt.id).limit(limit + 1)
+    )
+    prompts = result.scalars().all() if entities else result.all()
+    if len(prompts) <= limit:
+        return prompts, None
+    last = prompts[limit - 1]
+    return prompts[:limit], encode_cursor(last.created_at, last.id)
+
+
+async def list_prompts(db: AsyncSession, user: CurrentUser, limit: int = PROMPT_PAGE_SIZE, after: Optional[str] = None) -> tuple[list[Prompt], Optional[str]]:
+    """
+    Returns a page of prompts created by the user, ordered by creation date (descending),
+    and the cursor of the next page.
+    """
+    return await _paginate(db, select(Prompt).where(Prompt.user_id == user.id), limit, after)
+
+
+def _projected_column(field: str):
+    if field == "preview":
+        return func.substr(Prompt.original_prompt, 1, PROMPT_PREVIEW_LENGTH).label("preview")
+    return getattr(Prompt, field)
+
+
+async def list_prompt_fields(db: AsyncSession, user: CurrentUser, fields: list[str], favorites_only: bool = False, limit: int = PROMPT_PAGE_SIZE, after: Optional[str] = None) -> tuple[list[dict], Optional[str]]:
+    """
+    Lightweight variant of list_prompts / list_favorite_prompts that selects only the
+    requested columns (see PROMPT_PROJECTION_FIELDS) instead of whole Prompt rows.
+    The 'preview' field is the start of the original prompt, truncated in SQL.
+    Returns a page of plain dicts and the cursor of the next page.
+    """
+    selected = list(dict.fromkeys(["id", "created_at", *fields]))
+    query = select(*(_projected_column(field) for field in selected)).where(
+        Prompt.user_id == user.id)
+    if favorites_only:
+        query = query.where(Prompt.is_favorite == True)
+    rows, next_cursor = await _paginate(db, query, limit, after, entities=False)
+    return [{field: getattr(row, field) for field in fields} for row in rows], next_cursor
+
+
+async def get_prompt_by_id(db: AsyncSession, user: CurrentUser, prompt_id: UUID) -> Prompt:
     """
     Retrieves a prompt by its ID for the given user.
     Raises HTTPException 404 if not found.
     """
-    prompt = db.query(Prompt).filter(Prompt.id == prompt_id,
-                                     Prompt.user_id == user.id).first()
+    prompt = await db.scalar(select(Prompt).where(Prompt.id == prompt_id,
+                                                  Prompt.user_id == user.id))
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
     return prompt
 
 
-def delete_prompt(db: Session, user: User, prompt_id: UUID):
+async def delete_prompt(db: AsyncSession, user: CurrentUser, prompt_id: UUID):
     """
-    Deletes a prompt by its ID for the given user.
+    Deletes a prompt by its ID for the given user with a single DELETE ... RETURNING.
+    Raises HTTPException 404 if not found.
     """
-    prompt = get_prompt_by_id(db, user, prompt_id)
-    db.delete(prompt)
-    db.commit()
+    deleted = (await db.execute(
+        delete(Prompt)
+        .where(Prompt.id == prompt_id, Prompt.user_id == user.id)
+        .returning(Prompt.original_prompt)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    await _bump_prompt_version(db, user.id)
+    await db.commit()
+    forget_prompt(user.id, prompt_id, deleted.original_prompt)
 
 
-def regenerate_prompt(db: Session, user: User, prompt_id: UUID, new_text: str) -> Prompt:
+async def regenerate_prompt(db: AsyncSession, user: CurrentUser, prompt_id: UUID, new_text: str) -> Prompt:
     """
     Regenerates an optimized prompt and explanation for a given prompt ID using new text.
+    The new text is routed to a model tier like in improve_prompt.
     Updates the existing Prompt object in the database.
     """
-    prompt = get_prompt_by_id(db, user, prompt_id)
+    model, new_text = route_prompt(new_text)
+    prompt = await get_prompt_by_id(db, user, prompt_id)
+    # Return the pooled connection while waiting on OpenAI.
+    await db.commit()
 
-    response = openai.chat.completions.create(
-        model='gpt-4',
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": new_text}
-        ]
-    )
-    content = response.choices[0].message.content
-    total_tokens = response.usage.total_tokens
-
-    optimized = content.strip()
-    explanation = None
-    if "\n\nExplicación:" in content:
-        try:
-            optimized, explanation = content.split("\n\nExplicación:", 1)
-            optimized = optimized.strip()
-            explanation = explanation.strip()
-        except ValueError:
-            pass
+    optimized, explanation, total_tokens = await _optimize_text(new_text, model)
 
+    previous_text = prompt.original_prompt
     prompt.original_prompt = new_text
     prompt.optimized_prompt = optimized
-    prompt.explanation = explanation.strip() if explanation else None
+    prompt.explanation = explanation
     prompt.total_tokens = total_tokens
-    db.commit()
-    db.refresh(prompt)
+    prompt.model = model
+    await _bump_prompt_version(db, user.id)
+    await record_usage(db, user.id, total_tokens)
+    await db.commit()
+    await db.refresh(prompt)
+    forget_prompt(user.id, prompt.id, previous_text)
+    index_prompt(user.id, prompt.id, new_text)
     return prompt
 
 
-def toggle_favorite_prompt(db: Session, user: User, prompt_id: UUID, favorite: bool) -> Prompt:
+async def toggle_favorite_prompt(db: AsyncSession, user: CurrentUser, prompt_id: UUID, favorite: bool) -> Prompt:
     """
-    Sets or unsets a prompt as favorite for the given user.
+    Sets or unsets a prompt as favorite for the given user with a single
+    UPDATE ... RETURNING.
     Returns the updated Prompt object.
+    Raises HTTPException 404 if not found.
     """
-    prompt = get_prompt_by_id(db, user, prompt_id)
-    prompt.is_favorite = favorite
-    db.commit()
-    db.refresh(prompt)
+    prompt = await db.scalar(
+        update(Prompt)
+        .where(Prompt.id == prompt_id, Prompt.user_id == user.id)
+        .values(is_favorite=favorite)
+        .returning(Prompt)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    if not prompt:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    await _bump_prompt_version(db, user.id)
+    await db.commit()
     return prompt
 
 
-def list_favorite_prompts(db: Session, user: User) -> list[Prompt]:
+async def bulk_update_prompts(db: AsyncSession, user: CurrentUser, ids: list[UUID], action: str) -> list[UUID]:
     """
-    Returns a list of all favorite prompts for the given user, ordered by creation date (descending).
+    Favorites, unfavorites or deletes a set of the user's prompts with a single
+    UPDATE/DELETE ... WHERE user_id = ? AND id IN (...) RETURNING statement.
+    IDs that do not exist or belong to another user are skipped.
+    Returns the IDs of the prompts that were changed.
     """
-    return db.query(Prompt).filter(Prompt.user_id == user.id, Prompt.is_favorite == True).order_by(Prompt.created_at.desc()).all()
+    where = (Prompt.user_id == user.id, Prompt.id.in_(set(ids)))
+    if action == "delete":
+        stmt = delete(Prompt).where(*where)
+    else:
+        stmt = update(Prompt).where(*where).values(is_favorite=action == "favorite")
+    changed = (await db.scalars(
+        stmt.returning(Prompt.id).execution_options(synchronize_session=False)
+    )).all()
+    if changed:
+        await _bump_prompt_version(db, user.id)
+    await db.commit()
+    return changed
+
+
+async def list_favorite_prompts(db: AsyncSession, user: CurrentUser, limit: int = PROMPT_PAGE_SIZE, after: Optional[str] = None) -> tuple[list[Prompt], Optional[str]]:
+    """
+    Returns a page of favorite prompts for the given user, ordered by creation date (descending),
+    and the cursor of the next page.
+    """
+    return await _paginate(db, select(Prompt).where(Prompt.user_id == user.id, Prompt.is_favorite == True), limit, after)
+
+
+def _postgres_search(user: CurrentUser, q: str):
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    vector = literal_column("prompts.search_vector")
+    rank = func.ts_rank_cd(vector, query, type_=Float)
+    options = f"StartSel={SEARCH_HIGHLIGHT_START}, StopSel={SEARCH_HIGHLIGHT_STOP}, MaxFragments=2"
+    highlights = [
+        func.ts_headline(SEARCH_CONFIG, func.coalesce(getattr(Prompt, field), ""), query, options)
+        for field in SEARCHABLE_FIELDS
+    ]
+    return select(Prompt, rank, *highlights).where(
+        Prompt.user_id == user.id, vector.op("@@")(query)
+    ), rank
+
+
+def _sqlite_search(user: CurrentUser, q: str):
+    # Quote every term so FTS5 operators in user input are matched literally.
+    match = " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+    fts = literal_column("prompts_fts")
+    fts_table = table("prompts_fts", column("prompt_id"))
+    rank = -func.bm25(fts, 0.0, 10.0, 5.0, 1.0, type_=Float)
+    highlights = [
+        func.snippet(fts, column, SEARCH_HIGHLIGHT_START, SEARCH_HIGHLIGHT_STOP, "…", 32)
+        for column, _ in enumerate(SEARCHABLE_FIELDS, start=1)
+    ]
+    return select(Prompt, rank, *highlights).join(
+        fts_table, fts_table.c.prompt_id == Prompt.id
+    ).where(Prompt.user_id == user.id, fts.op("MATCH")(match)), rank
+
+
+async def search_prompts(db: AsyncSession, user: CurrentUser, q: str, limit: int = PROMPT_PAGE_SIZE, offset: int = 0) -> tuple[list[tuple[Prompt, float, dict]], Optional[int]]:
+    """
+    Searches the original prompt, optimized prompt and explanation of the user's prompts.
+    Uses the tsvector column on PostgreSQL and the FTS5 table on SQLite.
+    Returns a page of (prompt, rank, highlights) tuples ordered by relevance, and the
+    offset of the next page, or None on the last page.
+    Raises HTTPException 400 if q is blank, or 501 if the database does not support
+    full-text search.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query must not be blank")
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt, rank = _postgres_search(user, q)
+    elif dialect == "sqlite":
+        stmt, rank = _sqlite_search(user, q)
+    else:
+        raise HTTPException(
+            status_code=501, detail="Search is not supported for this database")
+
+    rows = (await db.execute(
+        stmt.order_by(rank.desc(), Prompt.created_at.desc(), Prompt.id)
+        .limit(limit + 1).offset(offset)
+    )).all()
+    results = [
+        (row[0], float(row[1]), dict(zip(SEARCHABLE_FIELDS, row[2:])))
+        for row in rows[:limit]
+    ]
+    return results, offset + limit if len(rows) > limit else None
+
+
+async def export_prompts(db: AsyncSession, user: CurrentUser, format: str) -> AsyncIterator[str]:
+    """
+    Returns an async iterator over the user's whole prompt history, newest first, as
+    NDJSON or as CSV with a header row.
+    Rows are read from a server-side cursor PROMPT_TRANSFER_CHUNK_SIZE at a time, so
+    memory use does not grow with the history. The rows are read in their own
+    session, since the request session may already be closed while the response is
+    being streamed.
+    """
+    await db.commit()
+    query = (
+        select(*(getattr(Prompt, field) for field in PROMPT_EXPORT_FIELDS))
+        .where(Prompt.user_id == user.id)
+        .order_by(Prompt.created_at.desc(), Prompt.id)
+        .execution_options(yield_per=PROMPT_TRANSFER_CHUNK_SIZE)
+    )
+
+    async def rows() -> AsyncIterator[str]:
+        if format == "csv":
+            yield to_csv([PROMPT_EXPORT_FIELDS])
+        async with ReadSessionLocal(user.id) as session:
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                if format == "csv":
+                    yield to_csv(partition)
+                else:
+                    yield to_ndjson(PROMPT_EXPORT_FIELDS, partition)
+
+    return rows()
+
+
+def _optional_text(value) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise ValueError("expected a string")
+    return value
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None or value == "":
+        return False
+    if isinstance(value, str) and value.strip().lower() in ("true", "1", "false", "0"):
+        return value.strip().lower() in ("true", "1")
+    raise ValueError("expected a boolean")
+
+
+def _parse_created_at(value, default: datetime) -> datetime:
+    if value is None or value == "":
+        return default
+    created_at = datetime.fromisoformat(value)
+    # Stored in UTC: SQLite drops the offset, and cursors and usage days assume UTC.
+    return created_at.astimezone(timezone.utc) if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)
+
+
+def _import_row(user_id: UUID, number: int, record: dict, now: datetime) -> dict:
+    """
+    Validates an imported record and maps it to the values of a new Prompt row.
+    Unknown keys (including 'id') are ignored; imported prompts always get a new ID.
+    Raises ValueError naming the offending line and field.
+    """
+    values = {"user_id": user_id}
+    for field, parse in (
+        ("original_prompt", _optional_text),
+        ("optimized_prompt", _optional_text),
+        ("explanation", _optional_text),
+        ("model", _optional_text),
+        ("total_tokens", lambda value: int(value or 0)),
+        ("is_favorite", _parse_bool),
+        ("created_at", lambda value: _parse_created_at(value, now)),
+    ):
+        try:
+            values[field] = parse(record.get(field))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Line {number}: invalid {field} ({e})") from e
+    if not values["original_prompt"] or not values["original_prompt"].strip():
+        raise ValueError(f"Line {number}: original_prompt is required")
+    return values
+
+
+async def _insert_imported(db: AsyncSession, user: CurrentUser, rows: list[dict]) -> int:
+    """
+    Bulk inserts a chunk of imported rows and adds the optimized ones to the
+    similarity index right away, so the chunk does not have to be kept in memory
+    until the import commits. Entries of an import that is rolled back are dropped
+    from the index on their first lookup.
+    """
+    ids = (await db.scalars(
+        insert(Prompt).returning(Prompt.id, sort_by_parameter_order=True), rows
+    )).all()
+    for prompt_id, row in zip(ids, rows):
+        if row["optimized_prompt"]:
+            index_prompt(user.id, prompt_id, row["original_prompt"])
+    return len(ids)
+
+
+async def import_prompts(db: AsyncSession, user: CurrentUser, chunks: AsyncIterator[bytes], format: str) -> int:
+    """
+    Imports prompts from an NDJSON or CSV upload in the layout written by
+    export_prompts, parsing the body as it arrives and inserting
+    PROMPT_TRANSFER_CHUNK_SIZE rows per bulk INSERT.
+    Records without created_at are stamped with the import time. Imported prompts do
+    not count towards token usage, since no tokens are spent on them.
+    Nothing is committed until the whole upload was read, so an invalid record
+    rejects the entire import.
+    Returns the number of imported prompts.
+    Raises HTTPException 400 for malformed records and 413 if the upload has more
+    than PROMPT_IMPORT_MAX_ROWS records.
+    """
+    lines = iter_lines(chunks, PROMPT_IMPORT_MAX_RECORD_LENGTH)
+    if format == "csv":
+        records = iter_csv(lines, PROMPT_IMPORT_MAX_RECORD_LENGTH)
+    else:
+        records = iter_ndjson(lines)
+    now = datetime.now(timezone.utc)
+    rows = []
+    imported = 0
+    try:
+        async for number, record in records:
+            if imported + len(rows) >= settings.prompt_import_max_rows:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Import cannot contain more than {settings.prompt_import_max_rows} prompts")
+            rows.append(_import_row(user.id, number, record, now))
+            if len(rows) == PROMPT_TRANSFER_CHUNK_SIZE:
+                imported += await _insert_imported(db, user, rows)
+                rows = []
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    if rows:
+        imported += await _insert_imported(db, user, rows)
+    if imported:
+        await _bump_prompt_version(db, user.id)
+    await db.commit()
+    return imported
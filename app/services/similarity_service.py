@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import math
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.core.simhash import FINGERPRINT_BITS, SimHashIndex, similarity, simhash
+from app.db.session import SessionLocal
+from app.models.prompt import Prompt
+from app.schemas.auth import CurrentUser
+
+settings = get_settings()
+
+SIMILARITY_BUILD_CHUNK_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+# Scoped per user: a near-duplicate of someone else's prompt may still carry their data.
+_index: SimHashIndex[UUID] = SimHashIndex(bands=4)
+_stats = {"ready": False, "hits": 0, "misses": 0, "stale": 0}
+
+
+def _add(user_id: UUID, prompt_id: UUID, fingerprint: int):
+    # Prompts without any word (fingerprint 0) are not indexed.
+    if fingerprint and _index.size < settings.prompt_similarity_max_entries:
+        _index.add(user_id, fingerprint, prompt_id)
+
+
+def index_prompt(user_id: UUID, prompt_id: UUID, original_prompt: str):
+    """
+    Adds an optimized prompt to this process's near-duplicate index, unless the index
+    already holds PROMPT_SIMILARITY_MAX_ENTRIES prompts.
+    """
+    if settings.prompt_similarity_enabled:
+        _add(user_id, prompt_id, simhash(original_prompt))
+
+
+def forget_prompt(user_id: UUID, prompt_id: UUID, original_prompt: str):
+    """
+    Removes a prompt from the index under the fingerprint of the text it was indexed
+    with; called before a prompt's text changes or the prompt is deleted.
+    """
+    if settings.prompt_similarity_enabled:
+        _index.discard(user_id, simhash(original_prompt), prompt_id)
+
+
+def _fingerprints(texts: list[str]) -> list[int]:
+    return [simhash(text) for text in texts]
+
+
+async def find_similar_prompt(db: AsyncSession, user: CurrentUser, prompt_text: str) -> Optional[tuple[Prompt, float]]:
+    """
+    Looks up the user's stored prompt closest to prompt_text in the SimHash index.
+    Candidates are loaded closest first and compared again using their current text;
+    prompts deleted or changed since they were indexed are dropped from the index
+    and the next candidate is tried.
+    Returns the prompt and its similarity, or None if no stored optimization is at
+    least PROMPT_SIMILARITY_THRESHOLD similar.
+    """
+    if not settings.prompt_similarity_enabled:
+        return None
+    fingerprint = simhash(prompt_text)
+    if not fingerprint:
+        return None
+    max_distance = math.floor((1 - settings.prompt_similarity_threshold) * FINGERPRINT_BITS)
+    for indexed_fingerprint, prompt_id in _index.query(user.id, fingerprint, max_distance):
+        prompt = await db.scalar(select(Prompt).where(Prompt.id == prompt_id, Prompt.user_id == user.id))
+        current = simhash(prompt.original_prompt) if prompt else None
+        if current != indexed_fingerprint or not prompt.optimized_prompt:
+            _index.discard(user.id, indexed_fingerprint, prompt_id)
+            _stats["stale"] += 1
+            continue
+        _stats["hits"] += 1
+        return prompt, similarity(fingerprint, current)
+    _stats["misses"] += 1
+    return None
+
+
+async def build_similarity_index():
+    """
+    Fills the index from the stored optimized prompts, streaming them in chunks that
+    are hashed in a worker thread, so requests keep being served while a large
+    history is hashed. Stops once PROMPT_SIMILARITY_MAX_ENTRIES prompts are indexed.
+    Runs as a background task on startup; until it finishes, lookups only see the
+    prompts written by this process.
+    """
+    if not settings.prompt_similarity_enabled:
+        return
+    query = (
+        select(Prompt.user_id, Prompt.id, Prompt.original_prompt)
+        .where(Prompt.optimized_prompt.isnot(None))
+        .execution_options(yield_per=SIMILARITY_BUILD_CHUNK_SIZE)
+    )
+    try:
+        async with SessionLocal() as session:
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                if _index.size >= settings.prompt_similarity_max_entries:
+                    logger.warning("Prompt similarity index is full at %s prompts", _index.size)
+                    break
+                fingerprints = await asyncio.to_thread(
+                    _fingerprints, [original_prompt for _, _, original_prompt in partition])
+                for (user_id, prompt_id, _), fingerprint in zip(partition, fingerprints):
+                    _add(user_id, prompt_id, fingerprint)
+    except Exception:
+        logger.exception("Could not build the prompt similarity index")
+        return
+    _stats["ready"] = True
+    logger.info("Prompt similarity index built with %s prompts", _index.size)
+
+
+def get_similarity_stats() -> dict:
+    """
+    Returns the size of this process's near-duplicate index and its hit/miss counters.
+    """
+    return {
+        **_stats,
+        "enabled": settings.prompt_similarity_enabled,
+        "threshold": settings.prompt_similarity_threshold,
+        "entries": _index.size,
+        "max_entries": settings.prompt_similarity_max_entries,
+    }
@@ -0,0 +1,46 @@
+from datetime import date, datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from uuid import UUID
+from app.db.dialect import dialect_insert
+from app.models.user_usage import UserUsage
+from app.schemas.auth import CurrentUser
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+async def record_usage(db: AsyncSession, user_id: UUID, total_tokens: int, prompts: int = 1):
+    """
+    Adds prompts and tokens to the user's bucket for the current UTC day.
+    Joins the caller's transaction, so usage is committed together with the prompt write.
+    """
+    stmt = dialect_insert(db.get_bind().dialect.name, UserUsage).values(
+        user_id=user_id,
+        day=utc_today(),
+        prompts=prompts,
+        total_tokens=total_tokens,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserUsage.user_id, UserUsage.day],
+        set_={
+            "prompts": UserUsage.prompts + stmt.excluded.prompts,
+            "total_tokens": UserUsage.total_tokens + stmt.excluded.total_tokens,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_usage(db: AsyncSession, user: CurrentUser, start: date, end: date) -> list[UserUsage]:
+    """
+    Returns the user's daily usage buckets between start and end (inclusive), oldest first.
+    Days without activity have no bucket.
+    """
+    return (await db.scalars(
+        select(UserUsage)
+        .where(UserUsage.user_id == user.id, UserUsage.day >= start, UserUsage.day <= end)
+        .order_by(UserUsage.day)
+    )).all()
@@ -0,0 +1,117 @@
+"""
+Cold start benchmark: import time of app.main and latency of the first request.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and reports the
+total import time and the slowest modules (cumulative, including their own imports).
+With --first-request it also times a first GET /status/cache in a fresh process,
+measured from interpreter start through lifespan startup.
+
+Usage:
+    python -m benchmarks.bench_import_time [--runs N] [--top K] [--first-request]
+                                           [--output run.json] [--max-ms MS]
+
+--max-ms exits with status 1 when the median import time is above the threshold, so
+the benchmark can guard against import time regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORT_TARGET = "app.main"
+
+FIRST_REQUEST_SCRIPT = """
+import asyncio, time
+start = time.perf_counter()
+import httpx
+from app.main import app
+
+async def main():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/status/cache")
+            response.raise_for_status()
+    return time.perf_counter() - start
+
+print(asyncio.run(main()))
+"""
+
+
+def _env() -> dict:
+    # Job workers would start polling the database as soon as the lifespan runs.
+    return {**os.environ, "PROMPT_JOB_WORKERS": "0"}
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """
+    Returns the cumulative import time in microseconds of every module listed in
+    -X importtime output, keyed by module name.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def measure_import() -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {IMPORT_TARGET}"],
+        capture_output=True, text=True, env=_env())
+    if result.returncode != 0:
+        raise SystemExit(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def measure_first_request() -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST_SCRIPT], capture_output=True, text=True, env=_env())
+    if result.returncode != 0:
+        raise SystemExit(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--first-request", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--max-ms", type=float)
+    args = parser.parse_args()
+
+    # The first run also compiles bytecode; it is not representative of a warm image.
+    measure_import()
+    runs = [measure_import() for _ in range(args.runs)]
+    totals_ms = [run[IMPORT_TARGET] / 1000 for run in runs]
+    median_ms = statistics.median(totals_ms)
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    print(f"import {IMPORT_TARGET}: median {median_ms:.1f} ms, "
+          f"min {min(totals_ms):.1f} ms, max {max(totals_ms):.1f} ms ({args.runs} runs)")
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    report = {"import_ms": {"median": median_ms, "min": min(totals_ms), "max": max(totals_ms)},
+              "slowest_modules_ms": {name: cumulative / 1000 for name, cumulative in slowest}}
+    if args.first_request:
+        first_ms = [measure_first_request() * 1000 for _ in range(args.runs)]
+        report["first_request_ms"] = {"median": statistics.median(first_ms),
+                                      "min": min(first_ms), "max": max(first_ms)}
+        print(f"first request: median {statistics.median(first_ms):.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"import time {median_ms:.1f} ms is above the {args.max_ms:.1f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
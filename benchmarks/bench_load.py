@@ -0,0 +1,217 @@
+"""
+Scripted load test against a running API, reporting throughput and latency
+percentiles per endpoint as JSON.
+
+Scenarios:
+    login_storm      every virtual user logs in over and over
+    history_polling  virtual users poll their prompt list and favorites, sending
+                     If-None-Match with the last ETag like a real client
+    improve_burst    virtual users submit distinct prompts to /prompt/improve
+
+Prepare the database with benchmarks.seed, run benchmarks.fake_openai, and start the
+API with OPENAI_BASE_URL pointing at it and RATE_LIMIT_ENABLED=false (all virtual
+users share one address). Each run writes one JSON document with, per endpoint,
+request and error counts, status codes, throughput and p50/p95/p99 latency;
+--compare prints the change against a previous run.
+
+Usage:
+    python -m benchmarks.bench_load SCENARIO [SCENARIO ...] [--base-url http://127.0.0.1:8000]
+        [--concurrency 50] [--duration 30] [--users 200] [--output run.json]
+        [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+import httpx
+
+# Shared with benchmarks.seed, which creates these accounts.
+LOADTEST_PASSWORD = "loadtest-password"
+
+
+def loadtest_email(index: int) -> str:
+    return f"loadtest-{index}@example.com"
+
+
+class Recorder:
+    """
+    Collects the latency and status code of every request, keyed by endpoint.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][status] += 1
+        return response
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """
+    Returns the p-th percentile of an ascending list using the nearest-rank method.
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        statuses = dict(recorder.statuses[endpoint])
+        errors = sum(count for status, count in statuses.items()
+                     if not status.isdigit() or int(status) >= 400)
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "status_codes": statuses,
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+    return endpoints
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, user_index: int):
+    response = await recorder.request(
+        client, "POST /auth/login", "POST", "/auth/login",
+        json={"email": loadtest_email(user_index), "password": LOADTEST_PASSWORD})
+    if response is None or response.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def login_storm(client, recorder, vu: int, args, deadline: float):
+    index = vu
+    while time.perf_counter() < deadline:
+        await login(client, recorder, index % args.users)
+        index += args.concurrency
+
+
+async def history_polling(client, recorder, vu: int, args, deadline: float):
+    headers = await login(client, recorder, vu % args.users)
+    if headers is None:
+        return
+    etags = {}
+    while time.perf_counter() < deadline:
+        for endpoint, url in (("GET /prompt/", "/prompt/?limit=50"),
+                              ("GET /prompt/favorites", "/prompt/favorites?limit=50")):
+            conditional = {"If-None-Match": etags[url]} if url in etags else {}
+            response = await recorder.request(
+                client, endpoint, "GET", url, headers={**headers, **conditional})
+            if response is not None and "etag" in response.headers:
+                etags[url] = response.headers["etag"]
+        await asyncio.sleep(args.think_time)
+
+
+async def improve_burst(client, recorder, vu: int, args, deadline: float):
+    headers = await login(client, recorder, vu % args.users)
+    if headers is None:
+        return
+    sequence = 0
+    while time.perf_counter() < deadline:
+        sequence += 1
+        await recorder.request(
+            client, "POST /prompt/improve", "POST", "/prompt/improve", headers=headers,
+            json={"prompt": f"Write release notes for build {vu}-{sequence} in three bullet points."})
+        await asyncio.sleep(args.think_time)
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "history_polling": history_polling,
+    "improve_burst": improve_burst,
+}
+
+
+async def run_scenario(name: str, args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(SCENARIOS[name](client, recorder, vu, args, deadline)
+                               for vu in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        "scenario": name,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "endpoints": summarize(recorder, elapsed),
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """
+    Prints the p50/p95/p99 and throughput change of every endpoint present in both runs.
+    """
+    previous = {run["scenario"]: run["endpoints"] for run in baseline["runs"]}
+    for run in current["runs"]:
+        for endpoint, stats in run["endpoints"].items():
+            old = previous.get(run["scenario"], {}).get(endpoint)
+            if not old:
+                continue
+            changes = []
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+                delta = (stats[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                changes.append(f"{key} {old[key]} -> {stats[key]} ({delta:+.1f}%)")
+            print(f"{run['scenario']:>16} {endpoint}: " + ", ".join(changes), file=sys.stderr)
+
+
+async def run(args) -> dict:
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "python": platform.python_version(),
+        "runs": [],
+    }
+    for name in args.scenarios:
+        report["runs"].append(await run_scenario(name, args))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", nargs="+", choices=sorted(SCENARIOS))
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=50, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per scenario")
+    parser.add_argument("--users", type=int, default=200, help="seeded users to log in as")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="seconds a virtual user waits between requests")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON report to diff against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Throughput benchmark for rate limiter storage backends.
+
+Measures fixed-window hits per second against memory:// and the shared SQLite storage
+(app.core.rate_limit_storage), first in a single process and then with several worker
+processes hitting the same SQLite file. That the shared counter sees every hit is
+checked by tests/test_rate_limit_storage.py.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter [--hits N] [--processes P]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from app.core import rate_limit_storage  # noqa: F401  registers the sqlite:// storage scheme
+
+LIMIT = parse("1000000000 per hour")
+
+
+def run_hits(uri: str, hits: int, key: str) -> float:
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    start = time.perf_counter()
+    for _ in range(hits):
+        limiter.hit(LIMIT, key)
+    return time.perf_counter() - start
+
+
+def _worker(args):
+    uri, hits = args
+    return run_hits(uri, hits, "shared")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_uri = "sqlite:///" + os.path.join(tmp, "ratelimit.db")
+
+        for name, uri in (("memory", "memory://"), ("sqlite", sqlite_uri)):
+            elapsed = run_hits(uri, args.hits, f"single-{name}")
+            print(f"{name:>6} x1: {args.hits / elapsed:,.0f} hits/s")
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            pool.map(_worker, [(sqlite_uri, args.hits)] * args.processes)
+        elapsed = time.perf_counter() - start
+        total = args.hits * args.processes
+        print(f"sqlite x{args.processes}: {total / elapsed:,.0f} hits/s aggregate")
+
+
+if __name__ == "__main__":
+    main()
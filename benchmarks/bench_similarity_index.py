@@ -0,0 +1,85 @@
+"""
+Latency benchmark for the near-duplicate prompt index (app.core.simhash).
+
+Fills a SimHashIndex with synthetic prompts spread over many users, then measures
+fingerprinting and lookup latency for near-duplicates (changed casing, punctuation
+and one word) and for unrelated prompts.
+
+Usage:
+    python -m benchmarks.bench_similarity_index [--entries N] [--users U] [--queries Q]
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from app.core.simhash import SimHashIndex, simhash
+
+VOCABULARY_SIZE = 5000
+PROMPT_WORDS = 40
+MAX_DISTANCE = 6
+
+
+def make_prompt(rng: random.Random, vocabulary: list[str]) -> str:
+    return " ".join(rng.choices(vocabulary, k=PROMPT_WORDS))
+
+
+def near_duplicate(rng: random.Random, prompt: str, vocabulary: list[str]) -> str:
+    words = prompt.split()
+    words[rng.randrange(len(words))] = rng.choice(vocabulary)
+    return " ".join(words).capitalize() + "."
+
+
+def percentiles(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {statistics.median(ordered) * 1e6:.1f} us, p99 {p99 * 1e6:.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [f"w{index}" for index in range(VOCABULARY_SIZE)]
+    users = [uuid.uuid4() for _ in range(args.users)]
+    index = SimHashIndex(bands=4)
+    samples = []
+
+    start = time.perf_counter()
+    for position in range(args.entries):
+        prompt = make_prompt(rng, vocabulary)
+        user = users[position % args.users]
+        index.add(user, simhash(prompt), position)
+        if len(samples) < args.queries:
+            samples.append((user, prompt, position))
+    elapsed = time.perf_counter() - start
+    print(f"build: {args.entries:,} entries in {elapsed:.1f}s "
+          f"({elapsed / args.entries * 1e6:.1f} us per entry)")
+
+    hashing, near, unrelated = [], [], []
+    found = 0
+    for user, prompt, position in samples:
+        query = near_duplicate(rng, prompt, vocabulary)
+        start = time.perf_counter()
+        fingerprint = simhash(query)
+        hashing.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        match = next(index.query(user, fingerprint, MAX_DISTANCE), None)
+        near.append(time.perf_counter() - start)
+        found += match is not None and match[1] == position
+
+        start = time.perf_counter()
+        next(index.query(user, simhash(make_prompt(rng, vocabulary)), MAX_DISTANCE), None)
+        unrelated.append(time.perf_counter() - start)
+
+    print(f"simhash:   {percentiles(hashing)}")
+    print(f"near:      {percentiles(near)}, found {found}/{len(samples)} within {MAX_DISTANCE} bits")
+    print(f"unrelated: {percentiles(unrelated)} (including simhash)")
+
+
+if __name__ == "__main__":
+    main()
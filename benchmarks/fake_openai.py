@@ -0,0 +1,123 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load tests that must not
+spend real tokens.
+
+Serves POST /v1/chat/completions (plain and stream=True) with a configurable latency
+and token usage. The reply echoes the last user message in the "optimized prompt +
+Explicación" format that app.services.prompt_service parses.
+
+Usage:
+    python -m benchmarks.fake_openai [--port 9100] [--latency-ms 800] [--jitter-ms 200]
+                                     [--prompt-tokens 120] [--completion-tokens 180]
+                                     [--chunks 20] [--error-rate 0.0]
+
+Then start the API with OPENAI_BASE_URL=http://127.0.0.1:9100/v1.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+app = FastAPI(title="Fake OpenAI")
+settings = argparse.Namespace(
+    latency_ms=800.0, jitter_ms=200.0, prompt_tokens=120, completion_tokens=180,
+    chunks=20, error_rate=0.0,
+)
+
+
+def _latency() -> float:
+    jitter = random.uniform(-settings.jitter_ms, settings.jitter_ms)
+    return max(0.0, settings.latency_ms + jitter) / 1000
+
+
+def _reply(messages: list[dict]) -> str:
+    prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"{prompt.strip()}\n\nBe specific and state the expected output.\n\nExplicación: Added an explicit output requirement."
+
+
+def _usage() -> dict:
+    return {
+        "prompt_tokens": settings.prompt_tokens,
+        "completion_tokens": settings.completion_tokens,
+        "total_tokens": settings.prompt_tokens + settings.completion_tokens,
+    }
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None, usage=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else [],
+        "usage": usage,
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def _stream(completion_id: str, model: str, content: str, include_usage: bool):
+    pieces = max(1, settings.chunks)
+    size = -(-len(content) // pieces)
+    delay = _latency() / pieces
+    yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+    for start in range(0, len(content), size):
+        await asyncio.sleep(delay)
+        yield _chunk(completion_id, model, {"content": content[start:start + size]})
+    yield _chunk(completion_id, model, {}, finish_reason="stop")
+    if include_usage:
+        yield _chunk(completion_id, model, {}, usage=_usage())
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if random.random() < settings.error_rate:
+        raise HTTPException(status_code=500, detail="Injected upstream error")
+    model = body.get("model", "gpt-4")
+    content = _reply(body.get("messages", []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    if body.get("stream"):
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return StreamingResponse(_stream(completion_id, model, content, include_usage),
+                                 media_type="text/event-stream")
+    await asyncio.sleep(_latency())
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": _usage(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=settings.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=settings.jitter_ms)
+    parser.add_argument("--prompt-tokens", type=int, default=settings.prompt_tokens)
+    parser.add_argument("--completion-tokens", type=int, default=settings.completion_tokens)
+    parser.add_argument("--chunks", type=int, default=settings.chunks,
+                        help="content deltas per streamed completion")
+    parser.add_argument("--error-rate", type=float, default=settings.error_rate,
+                        help="fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+    for name in vars(settings):
+        setattr(settings, name, getattr(args, name))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
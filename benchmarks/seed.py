@@ -0,0 +1,102 @@
+"""
+Seeds the database at DATABASE_URL with load-test users and prompt history.
+
+Creates --users accounts named loadtest-<n>@example.com, all sharing the password
+LOADTEST_PASSWORD, each with --prompts prompts spread over the last 90 days and
+roughly one in ten marked as favorite. Generation is seeded, so two runs with the
+same arguments produce the same dataset. Existing load-test users and their prompts
+are removed first; other data is left untouched.
+
+Usage:
+    python -m benchmarks.seed [--users 200] [--prompts 500] [--create-tables] [--seed 42]
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select
+from app.core.passwords import get_pwd_context
+from app.db.session import SessionLocal, dispose_engine
+from app.models.prompt import Prompt
+from app.models.user import User
+from benchmarks.bench_load import LOADTEST_PASSWORD, loadtest_email
+
+INSERT_CHUNK_SIZE = 5000
+
+SUBJECTS = ["a product launch email", "a SQL query", "a bedtime story", "unit tests",
+            "a cover letter", "a marketing slogan", "a Python function", "meeting notes",
+            "a travel itinerary", "a recipe", "release notes", "a job description"]
+VERBS = ["Write", "Summarize", "Improve", "Explain", "Translate", "Review", "Outline"]
+CONSTRAINTS = ["in three bullet points", "for a beginner", "in a formal tone",
+               "under 100 words", "with examples", "step by step", "as a table"]
+
+
+def _prompt_text(rng: random.Random) -> str:
+    return f"{rng.choice(VERBS)} {rng.choice(SUBJECTS)} {rng.choice(CONSTRAINTS)}."
+
+
+async def seed(users: int, prompts: int, rng: random.Random):
+    hashed = get_pwd_context().hash(LOADTEST_PASSWORD)
+    now = datetime.now(timezone.utc)
+    async with SessionLocal() as db:
+        stale = select(User.id).where(User.email.like("loadtest-%@example.com"))
+        await db.execute(delete(Prompt).where(Prompt.user_id.in_(stale)))
+        await db.execute(delete(User).where(User.email.like("loadtest-%@example.com")))
+
+        user_rows = [{
+            "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "username": f"loadtest-{index}",
+            "full_name": f"Load Test {index}",
+            "email": loadtest_email(index),
+            "hashed_password": hashed,
+            "is_active": True,
+        } for index in range(users)]
+        await db.execute(insert(User), user_rows)
+
+        batch = []
+        for user_row in user_rows:
+            for _ in range(prompts):
+                text = _prompt_text(rng)
+                batch.append({
+                    "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+                    "user_id": user_row["id"],
+                    "original_prompt": text,
+                    "optimized_prompt": f"{text} Be specific and state the expected output.",
+                    "explanation": "Added an explicit output requirement.",
+                    "total_tokens": rng.randint(80, 600),
+                    "created_at": now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600)),
+                    "is_favorite": rng.random() < 0.1,
+                })
+                if len(batch) >= INSERT_CHUNK_SIZE:
+                    await db.execute(insert(Prompt), batch)
+                    batch.clear()
+        if batch:
+            await db.execute(insert(Prompt), batch)
+        await db.commit()
+
+
+async def run(args):
+    if args.create_tables:
+        from app.db.init_db import init_db
+        await init_db()
+    start = time.perf_counter()
+    await seed(args.users, args.prompts, random.Random(args.seed))
+    await dispose_engine()
+    print(f"seeded {args.users} users and {args.users * args.prompts:,} prompts "
+          f"in {time.perf_counter() - start:.1f}s (password: {LOADTEST_PASSWORD})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--prompts", type=int, default=500, help="prompts per user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--create-tables", action="store_true",
+                        help="create the schema first (for a fresh SQLite file)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
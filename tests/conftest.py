@@ -0,0 +1,58 @@
+import asyncio
+import os
+import tempfile
+import uuid
+from typing import Awaitable, Callable
+
+# Settings are read once per process, so the test environment is set before the app
+# is imported: a throwaway SQLite database, in-process rate limits and cheap hashing.
+_tmp = tempfile.mkdtemp(prefix="promptlazy-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/app.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("RATE_LIMIT_STORAGE_URI", "memory://")
+os.environ.setdefault("PROMPT_JOB_WORKERS", "0")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import httpx  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.search import create_search_index  # noqa: E402
+from app.db.session import dispose_engine, get_engine  # noqa: E402
+from app.models import user, prompt, optimization_cache, user_usage, prompt_job  # noqa: E402,F401
+
+
+async def create_schema():
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_search_index)
+
+
+def run(coro: Awaitable):
+    """
+    Runs a coroutine against the test database in a fresh event loop, closing the
+    pooled connections before the loop ends.
+    """
+    async def main():
+        try:
+            await create_schema()
+            return await coro
+        finally:
+            await dispose_engine()
+
+    return asyncio.run(main())
+
+
+async def with_client(test: Callable[[httpx.AsyncClient, dict], Awaitable]):
+    """
+    Registers a fresh user and calls test with an API client and its auth headers.
+    """
+    from app.main import app
+
+    name = uuid.uuid4().hex[:12]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/auth/register", json={
+            "email": f"{name}@example.com", "password": "password123", "username": name, "full_name": name})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return await test(client, headers)
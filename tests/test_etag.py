@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import select, update
+from conftest import run, with_client
+from app.db.session import SessionLocal
+from app.models.user import User
+
+
+async def _import_prompt(client, headers) -> str:
+    await client.post("/prompt/import", headers=headers,
+                      content=b'{"original_prompt": "cache me", "optimized_prompt": "cached"}\n')
+    return (await client.get("/prompt/", headers=headers)).json()["prompts"][0]["id"]
+
+
+def test_prompt_writes_invalidate_the_etag():
+    async def test(client, headers):
+        prompt_id = await _import_prompt(client, headers)
+        listed = await client.get("/prompt/", headers=headers)
+        etag = listed.headers["ETag"]
+        unchanged = await client.get("/prompt/", headers={**headers, "If-None-Match": etag})
+        assert unchanged.status_code == 304
+        assert unchanged.headers["ETag"] == etag
+
+        await client.post(f"/prompt/{prompt_id}/favorite", headers=headers)
+        changed = await client.get("/prompt/", headers={**headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert changed.json()["prompts"][0]["is_favorite"]
+
+    run(with_client(test))
+
+
+def test_if_none_match_accepts_wildcards_lists_and_strong_tags():
+    async def test(client, headers):
+        prompt_id = await _import_prompt(client, headers)
+        etag = (await client.get(f"/prompt/{prompt_id}", headers=headers)).headers["ETag"]
+        other = f'W/"0-{uuid.uuid4().hex[:16]}"'
+        for header, status in (("*", 304),
+                               (f"{other}, {etag}", 304),
+                               (etag.removeprefix("W/"), 304),
+                               (other, 200)):
+            response = await client.get(f"/prompt/{prompt_id}",
+                                        headers={**headers, "If-None-Match": header})
+            assert response.status_code == status, header
+        # Tags differ per representation.
+        favorites = await client.get("/prompt/favorites", headers={**headers, "If-None-Match": etag})
+        assert favorites.status_code == 200
+
+    run(with_client(test))
+
+
+def test_prompt_writes_leave_the_profile_timestamp_alone():
+    async def test(client, headers):
+        email = (await client.get("/auth/me", headers=headers)).json()["email"]
+
+        profile_updated = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        async with SessionLocal() as db:
+            await db.execute(update(User).where(User.email == email).values(updated_at=profile_updated))
+            await db.commit()
+        await _import_prompt(client, headers)
+        async with SessionLocal() as db:
+            updated_at = await db.scalar(select(User.updated_at).where(User.email == email))
+        assert updated_at.replace(tzinfo=timezone.utc) == profile_updated
+
+    run(with_client(test))
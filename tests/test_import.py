@@ -0,0 +1,31 @@
+from conftest import run, with_client
+
+
+def test_imported_prompt_without_optimization_can_be_listed_and_searched():
+    async def test(client, headers):
+        response = await client.post("/prompt/import", headers=headers,
+                                     content=b'{"original_prompt": "only original"}\n')
+        assert response.json() == {"imported": 1}
+        listed = await client.get("/prompt/", headers=headers)
+        assert listed.status_code == 200
+        [prompt] = listed.json()["prompts"]
+        assert prompt["optimized_prompt"] is None
+        single = await client.get(f"/prompt/{prompt['id']}", headers=headers)
+        assert single.status_code == 200
+        found = await client.get("/prompt/search", params={"q": "only"}, headers=headers)
+        assert found.status_code == 200
+        assert [result["id"] for result in found.json()["results"]] == [prompt["id"]]
+
+    run(with_client(test))
+
+
+def test_imported_timestamps_are_stored_in_utc():
+    async def test(client, headers):
+        records = (b'{"original_prompt": "earlier", "created_at": "2024-01-01T10:00:00+05:00"}\n'
+                   b'{"original_prompt": "later", "created_at": "2024-01-01T06:00:00+00:00"}\n')
+        await client.post("/prompt/import", headers=headers, content=records)
+        prompts = (await client.get("/prompt/", headers=headers)).json()["prompts"]
+        assert [(p["original_prompt"], p["created_at"][:19]) for p in prompts] == [
+            ("later", "2024-01-01T06:00:00"), ("earlier", "2024-01-01T05:00:00")]
+
+    run(with_client(test))
@@ -0,0 +1,192 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+from conftest import run
+from app.db.session import SessionLocal
+from app.models.prompt import Prompt
+from app.models.prompt_job import PromptJob
+from app.models.user import User
+from app.services import job_service
+from app.services.job_service import JobWorkerPool, claim_next_job, run_job
+
+
+class FakeImprove:
+    """
+    Stands in for improve_prompt, failing with the given errors before succeeding.
+    """
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self, user, prompt_text: str, db):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.errors:
+            raise self.errors.pop(0)
+        prompt = Prompt(user_id=user.id, original_prompt=prompt_text, optimized_prompt="better")
+        db.add(prompt)
+        await db.commit()
+        return prompt
+
+
+@pytest.fixture
+def fake_improve(monkeypatch):
+    def use(*errors: Exception) -> FakeImprove:
+        fake = FakeImprove(*errors)
+        monkeypatch.setattr(job_service, "improve_prompt", fake)
+        return fake
+
+    return use
+
+
+async def _create_user() -> uuid.UUID:
+    # Also empties the queue, so each test only claims its own jobs.
+    user_id = uuid.uuid4()
+    async with SessionLocal() as db:
+        await db.execute(delete(PromptJob))
+        db.add(User(id=user_id, email=f"{user_id}@example.com", username=str(user_id), hashed_password="x"))
+        await db.commit()
+    return user_id
+
+
+async def _enqueue(user_id: uuid.UUID, text: str, priority: int = 0, age: int = 0) -> uuid.UUID:
+    # created_at is set explicitly: SQLite's now() only has second resolution.
+    job = PromptJob(user_id=user_id, prompt_text=text, status="queued", priority=priority, attempts=0,
+                    created_at=datetime.now(timezone.utc) - timedelta(seconds=age))
+    async with SessionLocal() as db:
+        db.add(job)
+        await db.commit()
+    return job.id
+
+
+async def _claim():
+    async with SessionLocal() as db:
+        return await claim_next_job(db)
+
+
+async def _job(job_id: uuid.UUID) -> PromptJob:
+    async with SessionLocal() as db:
+        return await db.get(PromptJob, job_id)
+
+
+def test_claimed_job_runs_to_success(fake_improve):
+    fake_improve()
+
+    async def test():
+        user_id = await _create_user()
+        job_id = await _enqueue(user_id, "Write a haiku")
+        job = await _claim()
+        assert (job.id, job.status, job.attempts) == (job_id, "running", 1)
+        assert job.lease_expires_at is not None
+        assert await _claim() is None
+
+        await run_job(job)
+        job = await _job(job_id)
+        assert job.status == "succeeded"
+        assert job.lease_expires_at is None and job.finished_at is not None
+        async with SessionLocal() as db:
+            assert (await db.get(Prompt, job.prompt_id)).optimized_prompt == "better"
+
+    run(test())
+
+
+def test_failed_jobs_are_retried_until_max_attempts(fake_improve):
+    fake = fake_improve(*[HTTPException(status_code=503, detail="upstream down")] * 3)
+
+    async def test():
+        job_id = await _enqueue(await _create_user(), "Write a haiku")
+        for attempt in (1, 2):
+            await run_job(await _claim())
+            job = await _job(job_id)
+            assert (job.status, job.attempts, job.error) == ("queued", attempt, "503: upstream down")
+        await run_job(await _claim())
+        job = await _job(job_id)
+        assert (job.status, job.attempts) == ("failed", 3)
+        assert await _claim() is None
+
+    run(test())
+    assert fake.calls == 3
+
+
+def test_client_errors_fail_without_retrying(fake_improve):
+    fake_improve(HTTPException(status_code=413, detail="Prompt is too long"))
+
+    async def test():
+        job_id = await _enqueue(await _create_user(), "Write a haiku")
+        await run_job(await _claim())
+        job = await _job(job_id)
+        assert (job.status, job.attempts) == ("failed", 1)
+
+    run(test())
+
+
+def test_expired_leases_are_claimed_again():
+    async def test():
+        job_id = await _enqueue(await _create_user(), "Write a haiku")
+        await _claim()
+        assert await _claim() is None
+        async with SessionLocal() as db:
+            await db.execute(update(PromptJob).where(PromptJob.id == job_id).values(
+                lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+            await db.commit()
+        job = await _claim()
+        assert (job.id, job.attempts) == (job_id, 2)
+
+    run(test())
+
+
+def test_claims_favour_users_with_fewer_running_jobs():
+    async def test():
+        busy = await _create_user()
+        busy_jobs = [await _enqueue(busy, f"busy {index}", age=60 - index) for index in range(4)]
+        quiet = uuid.uuid4()
+        async with SessionLocal() as db:
+            db.add(User(id=quiet, email=f"{quiet}@example.com", username=str(quiet), hashed_password="x"))
+            await db.commit()
+        quiet_low = await _enqueue(quiet, "quiet low", age=10)
+        quiet_high = await _enqueue(quiet, "quiet high", priority=5)
+
+        claimed = [(await _claim()).id for _ in range(4)]
+        # The user with fewer running jobs goes first, then higher priority, then older
+        # jobs; the busy user's backlog stops at two running jobs.
+        assert claimed == [quiet_high, busy_jobs[0], busy_jobs[1], quiet_low]
+        assert await _claim() is None
+
+    run(test())
+
+
+def test_concurrent_claimers_never_take_the_same_job():
+    async def test():
+        job_id = await _enqueue(await _create_user(), "Write a haiku")
+        claims = await asyncio.gather(*(_claim() for _ in range(4)))
+        assert [job.id for job in claims if job is not None] == [job_id]
+
+    run(test())
+
+
+def test_worker_pool_drains_the_queue(fake_improve):
+    fake = fake_improve(HTTPException(status_code=502, detail="upstream failed"))
+
+    async def test():
+        user_id = await _create_user()
+        job_ids = [await _enqueue(user_id, f"prompt {index}", age=10 - index) for index in range(3)]
+        pool = JobWorkerPool(2)
+        pool.start()
+        try:
+            pool.notify()
+            for _ in range(200):
+                jobs = [await _job(job_id) for job_id in job_ids]
+                if all(job.status == "succeeded" for job in jobs):
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await pool.stop()
+        assert [job.status for job in jobs] == ["succeeded"] * 3
+        assert sum(job.attempts for job in jobs) == 4
+
+    run(test())
+    assert fake.calls == 4
@@ -0,0 +1,59 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.db.base import Base
+from app.db.init_db import normalize_timestamps
+from app.db.session import create_engine_for
+from app.models import user, prompt, optimization_cache, user_usage, prompt_job
+from app.models.prompt import Prompt
+from app.models.user import User
+from app.schemas.auth import CurrentUser
+from app.services.prompt_service import list_prompts
+
+
+async def _walk_pages(url: str, page_size: int) -> list[uuid.UUID]:
+    engine = create_engine_for(url)
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    user_id = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessions() as db:
+        db.add(User(id=user_id, email="pages@example.com", username="pages", hashed_password="x"))
+        # Same-second rows in the database's own timestamp format, as stored by
+        # server_default=now() before created_at was set by the application...
+        for _ in range(4):
+            await db.execute(text("INSERT INTO prompts (id, user_id, original_prompt, created_at) "
+                                  "VALUES (:id, :user_id, 'legacy', '2026-01-01 10:00:00')"),
+                             {"id": uuid.uuid4().hex, "user_id": user_id.hex})
+        # ...imported rows with whole-second timestamps, and rows written by the app.
+        await db.execute(insert(Prompt), [
+            {"user_id": user_id, "original_prompt": "imported",
+             "created_at": datetime(2026, 1, 1, 10, 0, 0, tzinfo=timezone.utc)}
+            for _ in range(3)
+        ])
+        for _ in range(5):
+            db.add(Prompt(user_id=user_id, original_prompt="api"))
+        await db.commit()
+    async with engine.begin() as conn:
+        await conn.run_sync(normalize_timestamps)
+
+    current = CurrentUser(id=user_id, email="pages@example.com", username="pages", is_active=True)
+    seen, after = [], None
+    async with sessions() as db:
+        for _ in range(100):
+            prompts, after = await list_prompts(db, current, page_size, after)
+            seen.extend(prompt.id for prompt in prompts)
+            if after is None:
+                break
+    await engine.dispose()
+    assert after is None, "pagination did not terminate"
+    return seen
+
+
+def test_cursor_pagination_visits_every_prompt_once_on_sqlite(tmp_path):
+    for page_size in (1, 2, 3, 50):
+        seen = asyncio.run(_walk_pages(f"sqlite:///{tmp_path}/pages-{page_size}.db", page_size))
+        assert len(seen) == len(set(seen)) == 12
+
@@ -0,0 +1,83 @@
+import multiprocessing
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from app.core import rate_limit_storage
+from app.core.rate_limit_storage import SQLiteStorage
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit_storage, "time", clock)
+    return clock
+
+
+def _storage(tmp_path) -> SQLiteStorage:
+    return storage_from_string(f"sqlite:///{tmp_path}/ratelimit.db")
+
+
+def test_counts_within_a_window_and_resets_after_it(tmp_path, clock):
+    storage = _storage(tmp_path)
+    assert storage.incr("key", 60) == 1
+    assert storage.incr("key", 60, amount=3) == 4
+    assert storage.get("key") == 4
+    assert storage.get("other") == 0
+
+    clock.now += 59
+    assert storage.incr("key", 60) == 5
+    clock.now += 1
+    assert storage.get("key") == 0
+    assert storage.incr("key", 60) == 1
+    assert storage.get_expiry("key") == int(clock.now + 60)
+
+
+def test_get_expiry_is_the_end_of_the_window(tmp_path, clock):
+    storage = _storage(tmp_path)
+    assert storage.get_expiry("key") == int(clock.now)
+    storage.incr("key", 30)
+    clock.now += 10
+    # A hit inside the window does not extend it.
+    storage.incr("key", 30)
+    assert storage.get_expiry("key") == 1030
+    clock.now += 20
+    assert storage.get_expiry("key") == int(clock.now)
+
+
+def test_clear_and_reset(tmp_path, clock):
+    storage = _storage(tmp_path)
+    storage.incr("first", 60, amount=2)
+    storage.incr("second", 60)
+    storage.clear("first")
+    assert storage.get("first") == 0
+    assert storage.get("second") == 1
+    assert storage.reset() == 1
+    assert storage.get("second") == 0
+    assert storage.check()
+
+
+def _hit(args):
+    uri, hits = args
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    limit = parse("1000000 per hour")
+    for _ in range(hits):
+        limiter.hit(limit, "shared")
+
+
+def test_worker_processes_share_one_counter(tmp_path):
+    uri = f"sqlite:///{tmp_path}/ratelimit.db"
+    processes, hits = 4, 250
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        pool.map(_hit, [(uri, hits)] * processes)
+    limit = parse("1000000 per hour")
+    _, remaining = FixedWindowRateLimiter(storage_from_string(uri)).get_window_stats(limit, "shared")
+    assert limit.amount - remaining == processes * hits
@@ -0,0 +1,102 @@
+import uuid
+import pytest
+from limits.storage import storage_from_string
+from sqlalchemy import func, select
+from conftest import run
+from app.db import replicas as replicas_module
+from app.db.base import Base
+from app.db.replicas import PRIMARY_PIN_SECONDS, ReadSessionLocal, ReplicaSet, _pin_keys, pin_to_primary
+from app.db.session import SessionLocal
+from app.models.prompt import Prompt
+from app.models.user import User
+
+
+@pytest.fixture
+def use_replica(monkeypatch):
+    """
+    Routes reads to a replica at the given URL, with pins kept in memory.
+    """
+    def use(url: str) -> ReplicaSet:
+        replica_set = ReplicaSet((url,), max_lag=5, check_seconds=1)
+        monkeypatch.setattr(replicas_module, "replicas", replica_set)
+        monkeypatch.setattr(replicas_module, "_primary_pins", storage_from_string("memory://"))
+        return replica_set
+
+    return use
+
+
+async def _write_prompt() -> uuid.UUID:
+    # Written to the primary only; the replica file never receives it.
+    user_id = uuid.uuid4()
+    async with SessionLocal() as db:
+        db.add(User(id=user_id, email=f"{user_id}@example.com", username=str(user_id), hashed_password="x"))
+        db.add(Prompt(user_id=user_id, original_prompt="written to the primary"))
+        await db.commit()
+    return user_id
+
+
+async def _count_prompts(user_id: uuid.UUID) -> int:
+    async with ReadSessionLocal(user_id) as db:
+        return await db.scalar(select(func.count()).select_from(Prompt).where(Prompt.user_id == user_id))
+
+
+def test_reads_go_to_the_replica_until_the_user_writes(tmp_path, use_replica):
+    replica_set = use_replica(f"sqlite:///{tmp_path}/replica.db")
+
+    async def test():
+        async with replica_set.engines[0].begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            await replica_set.check()
+            assert replica_set.status()[0]["healthy"]
+            user_id = await _write_prompt()
+            assert await _count_prompts(user_id) == 0
+            assert replica_set.reads == [1]
+
+            await pin_to_primary(user_id)
+            assert await _count_prompts(user_id) == 1
+            assert await _count_prompts(uuid.uuid4()) == 0
+            assert replica_set.reads == [2]
+        finally:
+            await replica_set.stop()
+
+    run(test())
+
+
+def test_unreachable_replica_falls_back_to_the_primary(tmp_path, use_replica):
+    replica_set = use_replica(f"sqlite:///{tmp_path}/missing/replica.db")
+
+    async def test():
+        try:
+            await replica_set.check()
+            assert replica_set.status()[0] == {
+                "url": f"sqlite:///{tmp_path}/missing/replica.db", "healthy": False,
+                "lag_seconds": None, "reads": 0}
+            assert await _count_prompts(await _write_prompt()) == 1
+        finally:
+            await replica_set.stop()
+
+    run(test())
+
+
+def test_lagging_replica_falls_back_to_the_primary(tmp_path, use_replica, monkeypatch):
+    replica_set = use_replica(f"sqlite:///{tmp_path}/replica.db")
+    monkeypatch.setattr(replicas_module, "DEFAULT_LAG_QUERY", "SELECT 60")
+
+    async def test():
+        try:
+            await replica_set.check()
+            assert replica_set.lags == [60.0] and not replica_set.healthy(0)
+            assert await _count_prompts(await _write_prompt()) == 1
+        finally:
+            await replica_set.stop()
+
+    run(test())
+
+
+def test_pin_lasts_at_least_the_pin_window():
+    user_id = uuid.uuid4()
+    for written_at in (1000.0, 1000.5, 1000.0 + PRIMARY_PIN_SECONDS - 0.01):
+        written_key, _ = _pin_keys(user_id, written_at)
+        for elapsed in (0, 0.5, PRIMARY_PIN_SECONDS / 2, PRIMARY_PIN_SECONDS):
+            assert written_key in _pin_keys(user_id, written_at + elapsed)
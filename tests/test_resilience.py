@@ -0,0 +1,175 @@
+import asyncio
+import pytest
+from app.core import resilience
+from app.core.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, backoff_delay, hedged
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 20
+
+
+def test_half_open_probe_closes_or_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half_open"
+
+    breaker.before_call()
+    # Only one probe at a time.
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 1.0
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    breaker.before_call()
+
+
+def test_released_probe_leaves_the_circuit_half_open(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+    breaker.release()
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+
+def test_backoff_grows_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    assert [backoff_delay(attempt, base=0.5, cap=5) for attempt in range(6)] == [0.5, 1, 2, 4, 5, 5]
+    monkeypatch.undo()
+    assert all(0 <= backoff_delay(3, base=0.5, cap=5) <= 4 for _ in range(100))
+
+
+def test_latency_percentile_needs_enough_samples():
+    tracker = LatencyTracker(window=10, min_samples=5)
+    for seconds in (5, 1, 4, 2):
+        tracker.record(seconds)
+    assert tracker.percentile(95) is None
+    tracker.record(3)
+    assert tracker.percentile(50) == 3
+    assert tracker.percentile(95) == 5
+    for _ in range(10):
+        tracker.record(1)
+    assert tracker.percentile(95) == 1
+
+
+class Calls:
+    """
+    Upstream stand-in whose calls finish only when released, in call order.
+    """
+
+    def __init__(self):
+        self.started: list[asyncio.Future] = []
+        self.cancelled = 0
+
+    async def __call__(self):
+        future = asyncio.get_running_loop().create_future()
+        self.started.append(future)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+async def _wait_for_calls(calls: Calls, count: int):
+    while len(calls.started) < count:
+        await asyncio.sleep(0.001)
+
+
+def test_hedging_disabled_makes_a_single_call():
+    async def test():
+        calls = Calls()
+        task = asyncio.ensure_future(hedged(calls, None))
+        await _wait_for_calls(calls, 1)
+        calls.started[0].set_result("first")
+        assert await task == "first"
+        assert len(calls.started) == 1
+
+    asyncio.run(test())
+
+
+def test_fast_calls_are_not_hedged():
+    async def test():
+        calls, hedges = Calls(), []
+        task = asyncio.ensure_future(hedged(calls, 60, lambda: hedges.append(1)))
+        await _wait_for_calls(calls, 1)
+        calls.started[0].set_result("first")
+        assert await task == "first"
+        assert len(calls.started) == 1 and not hedges
+
+    asyncio.run(test())
+
+
+def test_slow_call_is_raced_against_a_hedge():
+    async def test():
+        calls, hedges = Calls(), []
+        task = asyncio.ensure_future(hedged(calls, 0.01, lambda: hedges.append(1)))
+        await _wait_for_calls(calls, 2)
+        calls.started[1].set_result("hedge")
+        assert await task == "hedge"
+        assert hedges == [1] and calls.cancelled == 1
+
+    asyncio.run(test())
+
+
+def test_hedge_failure_waits_for_the_original_call():
+    async def test():
+        calls = Calls()
+        task = asyncio.ensure_future(hedged(calls, 0.01))
+        await _wait_for_calls(calls, 2)
+        calls.started[1].set_exception(ValueError("hedge failed"))
+        await asyncio.sleep(0.001)
+        calls.started[0].set_result("first")
+        assert await task == "first"
+
+    asyncio.run(test())
+
+
+def test_hedged_call_raises_when_both_fail():
+    async def test():
+        calls = Calls()
+        task = asyncio.ensure_future(hedged(calls, 0.01))
+        await _wait_for_calls(calls, 2)
+        calls.started[0].set_exception(ValueError("first failed"))
+        await asyncio.sleep(0.001)
+        calls.started[1].set_exception(ValueError("hedge failed"))
+        with pytest.raises(ValueError, match="hedge failed"):
+            await task
+
+    asyncio.run(test())
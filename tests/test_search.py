@@ -0,0 +1,43 @@
+import asyncio
+import uuid
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.db.base import Base
+from app.db.search import create_search_index
+from app.db.session import create_engine_for
+from app.models import user, prompt, optimization_cache, user_usage, prompt_job
+from app.models.prompt import Prompt
+from app.models.user import User
+from app.schemas.auth import CurrentUser
+from app.services.prompt_service import search_prompts
+
+
+async def _search(url: str, q: str):
+    engine = create_engine_for(url)
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_search_index)
+    current = CurrentUser(id=uuid.uuid4(), email="search@example.com", username="search", is_active=True)
+    try:
+        async with sessions() as db:
+            db.add(User(id=current.id, email=current.email, username=current.username, hashed_password="x"))
+            db.add(Prompt(user_id=current.id, original_prompt="Summarize this article"))
+            await db.commit()
+            return await search_prompts(db, current, q)
+    finally:
+        await engine.dispose()
+
+
+def test_search_finds_prompt_on_sqlite(tmp_path):
+    results, next_offset = asyncio.run(_search(f"sqlite:///{tmp_path}/search.db", "  summarize  "))
+    assert [prompt.original_prompt for prompt, _, _ in results] == ["Summarize this article"]
+    assert next_offset is None
+
+
+@pytest.mark.parametrize("q", [" ", "\t\n"])
+def test_blank_search_query_is_rejected(tmp_path, q):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(_search(f"sqlite:///{tmp_path}/search.db", q))
+    assert error.value.status_code == 400
@@ -0,0 +1,78 @@
+import uuid
+from types import SimpleNamespace
+from conftest import run
+from app.core.simhash import SimHashIndex, simhash
+from app.db.session import SessionLocal
+from app.models.prompt import Prompt
+from app.models.user import User
+from app.schemas.auth import CurrentUser
+from app.services import prompt_service, similarity_service
+from app.services.similarity_service import find_similar_prompt
+
+
+def test_query_yields_each_candidate_once_closest_first():
+    index = SimHashIndex(bands=4)
+    index.add("user", 0b1111, "far")
+    index.add("user", 0b1, "near")
+    index.add("user", 0, "exact")
+    index.add("other", 0, "other scope")
+    index.add("user", (1 << 64) - 1, "too far")
+    assert list(index.query("user", 0, max_distance=4)) == [(0, "exact"), (0b1, "near"), (0b1111, "far")]
+    assert list(index.query("user", 0, max_distance=0)) == [(0, "exact")]
+
+
+async def _create_user() -> CurrentUser:
+    user_id = uuid.uuid4()
+    async with SessionLocal() as db:
+        db.add(User(id=user_id, email=f"{user_id}@example.com", username=str(user_id), hashed_password="x"))
+        await db.commit()
+    return CurrentUser(id=user_id, email=f"{user_id}@example.com", username=str(user_id), is_active=True)
+
+
+def test_stale_candidates_fall_through_to_the_next_one():
+    text = "Write a short poem about the sea at night"
+
+    async def test():
+        user = await _create_user()
+        async with SessionLocal() as db:
+            changed = Prompt(user_id=user.id, original_prompt="Something else entirely", optimized_prompt="old")
+            current = Prompt(user_id=user.id, original_prompt=text, optimized_prompt="current")
+            db.add_all([changed, current])
+            await db.commit()
+            # The first entry still carries the fingerprint of a text it no longer has.
+            similarity_service._index.add(user.id, simhash(text), changed.id)
+            similarity_service.index_prompt(user.id, current.id, text)
+
+            match, similarity = await find_similar_prompt(db, user, text)
+            assert (match.id, similarity) == (current.id, 1.0)
+            assert list(similarity_service._index.query(user.id, simhash(text), 0)) == [
+                (simhash(text), current.id)]
+
+    run(test())
+
+
+async def _completion(model: str, messages: list[dict], **kwargs):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=f"Improved: {messages[-1]['content']}"))],
+        usage=SimpleNamespace(total_tokens=10))
+
+
+def test_regenerated_and_deleted_prompts_leave_the_index(monkeypatch):
+    monkeypatch.setattr(prompt_service, "create_chat_completion", _completion)
+    before, after = "Summarize the quarterly sales report", "Translate the onboarding guide into Spanish"
+
+    async def test():
+        user = await _create_user()
+        async with SessionLocal() as db:
+            prompt = await prompt_service.improve_prompt(user, before, db)
+            size = similarity_service._index.size
+            await prompt_service.regenerate_prompt(db, user, prompt.id, after)
+            assert similarity_service._index.size == size
+            assert not list(similarity_service._index.query(user.id, simhash(before), 0))
+            assert (await find_similar_prompt(db, user, after))[0].id == prompt.id
+
+            await prompt_service.delete_prompt(db, user, prompt.id)
+            assert similarity_service._index.size == size - 1
+            assert await find_similar_prompt(db, user, after) is None
+
+    run(test())
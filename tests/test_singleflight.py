@@ -0,0 +1,172 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import select
+from conftest import run
+from app.core.llm import LLMTimeoutError
+from app.core.singleflight import SingleFlight
+from app.db.session import SessionLocal
+from app.models.optimization_cache import OptimizationCache
+from app.models.prompt import Prompt
+from app.models.user import User
+from app.schemas.auth import CurrentUser
+from app.services import cache_service, prompt_service
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def test():
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(10)))
+        assert [result for result, _ in results] == ["done"] * 10
+        assert [leader for _, leader in results].count(True) == 1
+        assert len(flight) == 0
+
+    asyncio.run(test())
+    assert calls == 1
+
+
+def test_errors_reach_every_waiter_and_the_key_is_released():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def test():
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(5)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(flight) == 0
+        assert await flight.do("key", lambda: asyncio.sleep(0, "retried")) == ("retried", True)
+
+    asyncio.run(test())
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def test():
+        first = asyncio.ensure_future(flight.do("key", lambda: asyncio.sleep(0.01, "done")))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.do("key", lambda: asyncio.sleep(0, "other")))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == ("done", False)
+
+    asyncio.run(test())
+
+
+class FakeCompletions:
+    """
+    Stands in for create_chat_completion, counting upstream calls.
+    """
+
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+
+    async def __call__(self, model: str, messages: list[dict], **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.error:
+            raise self.error
+        content = f"{messages[-1]['content']} with an output format\n\nExplicación: Added a format."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                               usage=SimpleNamespace(total_tokens=42))
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    cache_service._memory_cache.clear()
+    monkeypatch.setattr(prompt_service, "find_similar_prompt", _no_similar)
+
+    def use(error: Exception = None) -> FakeCompletions:
+        fake = FakeCompletions(error)
+        monkeypatch.setattr(prompt_service, "create_chat_completion", fake)
+        return fake
+
+    yield use
+    cache_service._memory_cache.clear()
+
+
+async def _no_similar(db, user, prompt_text):
+    return None
+
+
+async def _create_user() -> CurrentUser:
+    user_id = uuid.uuid4()
+    async with SessionLocal() as db:
+        db.add(User(id=user_id, email=f"{user_id}@example.com", username=str(user_id), hashed_password="x"))
+        await db.commit()
+    return CurrentUser(id=user_id, email=f"{user_id}@example.com", username=str(user_id), is_active=True)
+
+
+async def _improve(user: CurrentUser, text: str) -> Prompt:
+    async with SessionLocal() as db:
+        return await prompt_service.improve_prompt(user, text, db)
+
+
+def test_concurrent_identical_prompts_make_one_upstream_call(fake_openai):
+    fake = fake_openai()
+    text = f"Summarize this report {uuid.uuid4()}"
+
+    async def test():
+        user = await _create_user()
+        prompts = await asyncio.gather(*(_improve(user, text) for _ in range(8)))
+        assert fake.calls == 1
+        assert {prompt.optimized_prompt for prompt in prompts} == {f"{text} with an output format"}
+        assert sorted(prompt.total_tokens for prompt in prompts) == [0] * 7 + [42]
+        assert len(prompt_service._inflight) == 0
+
+    run(test())
+
+
+def test_upstream_errors_reach_every_concurrent_request(fake_openai):
+    fake = fake_openai(LLMTimeoutError("upstream timed out"))
+    text = f"Draft an email {uuid.uuid4()}"
+
+    async def test():
+        user = await _create_user()
+        results = await asyncio.gather(*(_improve(user, text) for _ in range(4)),
+                                       return_exceptions=True)
+        assert [result.status_code for result in results] == [504] * 4
+        assert len(prompt_service._inflight) == 0
+        async with SessionLocal() as db:
+            assert await db.scalar(select(Prompt).where(Prompt.user_id == user.id)) is None
+
+    run(test())
+    assert fake.calls == 1
+
+
+def test_repeated_prompts_are_served_from_memory_then_the_database(fake_openai):
+    fake = fake_openai()
+    text = f"Translate this paragraph {uuid.uuid4()}"
+
+    async def test():
+        user = await _create_user()
+        assert (await _improve(user, text)).total_tokens == 42
+        # Normalized: case and whitespace do not matter.
+        assert (await _improve(user, f"  {text.upper()} ")).total_tokens == 0
+        hits = cache_service.get_cache_stats()
+        # Another process only shares the database tier.
+        cache_service._memory_cache.clear()
+        prompt = await _improve(user, text)
+        assert prompt.total_tokens == 0
+        assert prompt.optimized_prompt == f"{text} with an output format"
+        stats = cache_service.get_cache_stats()
+        assert stats["db_hits"] == hits["db_hits"] + 1
+        async with SessionLocal() as db:
+            assert (await db.scalar(select(OptimizationCache.hits).where(
+                OptimizationCache.optimized_prompt == prompt.optimized_prompt))) == 1
+
+    run(test())
+    assert fake.calls == 1
@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+
+def test_importing_the_app_does_not_load_the_database_driver(tmp_path):
+    script = "import sys, app.main; print(','.join(m for m in ('aiosqlite', 'asyncpg') if m in sys.modules))"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path}/app.db"}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            env=env, cwd=root, check=True)
+    assert result.stdout.strip() == ""
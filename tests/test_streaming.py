@@ -0,0 +1,21 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core.llm import LLMUnavailableError
+from app.services import prompt_service
+
+
+async def _unavailable(*args, **kwargs):
+    raise LLMUnavailableError(retry_after=12.5)
+
+
+async def _persist(optimized, explanation, total_tokens):
+    raise AssertionError("nothing should be stored")
+
+
+def test_stream_fails_before_any_event_while_upstream_is_unavailable(monkeypatch):
+    monkeypatch.setattr(prompt_service, "create_chat_completion", _unavailable)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(prompt_service._stream_optimization("Fix my prompt", "gpt-4o-mini", _persist))
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "13"}